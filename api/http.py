@@ -0,0 +1,22 @@
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Tuple, Union
+
+
+class PooledSession(requests.Session):
+    def __init__(self, pool_size: int = 10, timeout: Union[float, Tuple[float, float]] = (5, 60)):
+        """
+        requests session with a keep-alive connection pool and a default timeout.
+        Retries are left to api.scheduler.RequestScheduler, so the adapter does not retry.
+        :param pool_size: Maximum number of pooled connections per host.
+        :param timeout: Default (connect, read) timeout in seconds for requests without an explicit one.
+        """
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0, pool_block=True)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
@@ -0,0 +1,226 @@
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from config.logger import logger
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# pytopvisor raises these from the error code in the JSON body, without an HTTP status attribute
+TOPVISOR_ERROR_STATUSES = {"RateLimitError": 429, "ServerError": 503}
+TOPVISOR_ERROR_CODE = re.compile(r"^\[(\d+)\]")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when an endpoint failed too often and its circuit breaker is open."""
+
+
+class DeadlineExceededError(RuntimeError):
+    """Raised when the run deadline passed before a request could be made."""
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """
+    Get the HTTP status of a failed request from the common exception shapes
+    (requests, googleapiclient and pytopvisor errors).
+    """
+    for candidate in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(getattr(error, "resp", None), "status", None),
+    ):
+        if candidate is not None:
+            try:
+                return int(candidate)
+            except (TypeError, ValueError):
+                continue
+    # Matched by class name so that pytopvisor is not imported here
+    names = [cls.__name__ for cls in type(error).__mro__]
+    for name in names:
+        if name in TOPVISOR_ERROR_STATUSES:
+            return TOPVISOR_ERROR_STATUSES[name]
+    if "TopvisorAPIError" in names:
+        match = TOPVISOR_ERROR_CODE.match(str(error))
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Check whether a failed request is worth retrying: rate limiting, server errors and network errors.
+    """
+    if isinstance(error, (CircuitOpenError, DeadlineExceededError)):
+        return False
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return isinstance(error, (OSError, ConnectionError, TimeoutError))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int, min_rate: Optional[float] = None):
+        """
+        Thread-safe token bucket whose rate adapts to throttling.
+        :param rate: Maximum number of requests per second.
+        :param burst: Bucket capacity.
+        :param min_rate: Lowest rate the bucket slows down to after throttling.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 10
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: Optional[float] = None):
+        """
+        Wait for a token.
+        :param deadline: time.monotonic() value after which waiting is pointless.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise DeadlineExceededError("Run deadline exceeded while waiting for the rate limiter.")
+            time.sleep(wait)
+
+    def slow_down(self):
+        """Halve the rate after the API signalled throttling."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self):
+        """Recover the rate step by step after successful requests."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = 5, cooldown: float = 60):
+        """
+        Stops calling an endpoint after repeated failures.
+        :param threshold: Consecutive failures opening the circuit.
+        :param cooldown: Seconds before a single trial request is let through again.
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def check(self, endpoint: str):
+        """Raise CircuitOpenError while the circuit is open."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.cooldown:
+                raise CircuitOpenError(f"Circuit breaker for '{endpoint}' is open.")
+            # Half-open: let one trial request through, further ones wait for its outcome
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self, endpoint: str):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold and self.opened_at is None:
+                logger.error("Circuit breaker for '%s' opened after %s consecutive failures.", endpoint, self.failures)
+                self.opened_at = time.monotonic()
+
+
+class RequestScheduler:
+    def __init__(self, requests_per_second: float = 5, burst: int = 10, max_retries: int = 5,
+                 backoff_base: float = 1.0, backoff_max: float = 60, breaker_threshold: int = 5,
+                 breaker_cooldown: float = 60, run_deadline: Optional[float] = None):
+        """
+        Shared scheduler for Topvisor requests: token-bucket rate limiting, jittered exponential
+        backoff on retryable errors, a circuit breaker per endpoint and a deadline per run.
+        :param requests_per_second: Maximum request rate.
+        :param burst: Number of requests allowed in a burst.
+        :param max_retries: Retries of a request on retryable errors.
+        :param backoff_base: Initial backoff delay in seconds.
+        :param backoff_max: Maximum backoff delay in seconds.
+        :param breaker_threshold: Consecutive failures opening an endpoint's circuit breaker.
+        :param breaker_cooldown: Seconds an open circuit breaker rejects requests.
+        :param run_deadline: Seconds a run may spend on requests, unlimited if None.
+        """
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.run_deadline = run_deadline
+        self.deadline: Optional[float] = None
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def start_run(self):
+        """Reset the run deadline and retry counter at the start of a run."""
+        self.deadline = time.monotonic() + self.run_deadline if self.run_deadline else None
+        self.retries = 0
+
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self.breakers[endpoint]
+
+    def execute(self, endpoint: str, request: Callable[[], Dict]) -> Dict:
+        """
+        Execute a request under the rate limit, retrying retryable errors.
+        :param endpoint: Name of the endpoint, used for the circuit breaker.
+        :param request: Callable making a single attempt.
+        :return: Response of the request.
+        """
+        breaker = self._breaker(endpoint)
+        for attempt in range(self.max_retries + 1):
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                raise DeadlineExceededError(f"Run deadline exceeded before calling '{endpoint}'.")
+            breaker.check(endpoint)
+            self.bucket.acquire(self.deadline)
+            try:
+                response = request()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                breaker.record_failure(endpoint)
+                if error_status(e) == 429:
+                    self.bucket.slow_down()
+                if attempt == self.max_retries:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+                if self.deadline is not None and time.monotonic() + delay > self.deadline:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                logger.warning("Request to '%s' failed (%s), retry %s in %.1fs...", endpoint, e, attempt + 1, delay)
+                time.sleep(delay)
+                continue
+            breaker.record_success()
+            self.bucket.speed_up()
+            return response
+
+    def stats(self) -> Dict:
+        """
+        Get the scheduler state for logging.
+        :return: Dictionary with the current rate, retries and open circuit breakers.
+        """
+        return {
+            "rate": round(self.bucket.rate, 2),
+            "retries": self.retries,
+            "open_breakers": [endpoint for endpoint, breaker in self.breakers.items() if breaker.opened_at],
+        }
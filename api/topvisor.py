@@ -0,0 +1,70 @@
+import requests
+from pytopvisor.services.api import TopvisorAPI
+from pytopvisor.services.factory import ServiceFactory
+from pytopvisor.topvisor import Topvisor
+
+from api.http import PooledSession
+from config.logger import brief, logger
+
+
+class PooledTopvisorAPI(TopvisorAPI):
+    def __init__(self, user_id, api_key, session: requests.Session):
+        """
+        pytopvisor API client sending requests through a shared session instead of requests.post,
+        so connections to api.topvisor.com are kept alive and reused between requests and threads.
+        :param user_id: Topvisor user ID.
+        :param api_key: Topvisor API key.
+        :param session: Session with the connection pool.
+        """
+        super().__init__(user_id, api_key)
+        self.session = session
+
+    def _post(self, endpoint, payload) -> requests.Response:
+        url = f"{self.base_url}{endpoint}"
+        response = self.session.post(url, headers=self.headers, json=payload)
+        response.raise_for_status()
+        logger.debug("API request completed successfully: %s", url)
+        return response
+
+    def send_request(self, endpoint, payload):
+        try:
+            response = self._post(endpoint, payload)
+            try:
+                data = response.json()
+            except ValueError as e:
+                logger.error("JSON parsing error: %s. Response: %s", e, brief(response.text))
+                raise RuntimeError("Response from API is not valid JSON.")
+
+            if "errors" in data and data["errors"]:
+                self._handle_api_errors(response.url, data["errors"])
+
+            return data
+
+        except requests.exceptions.RequestException as e:
+            logger.error("Error during API request: %s", e)
+            raise
+
+    def send_text_request(self, endpoint, payload):
+        try:
+            return self.parse_text_response(self._post(endpoint, payload).text)
+        except requests.exceptions.RequestException as e:
+            logger.error("Error during API request: %s", e)
+            raise
+
+
+def create_topvisor(user_id, api_key, pool_size: int = 10, connect_timeout: float = 5,
+                    read_timeout: float = 60) -> Topvisor:
+    """
+    Create a Topvisor client whose requests share a pooled keep-alive session.
+    :param user_id: Topvisor user ID.
+    :param api_key: Topvisor API key.
+    :param pool_size: Maximum number of pooled connections, at least the number of concurrent requests.
+    :param connect_timeout: Connect timeout in seconds.
+    :param read_timeout: Read timeout in seconds.
+    :return: Topvisor client.
+    """
+    client = Topvisor(user_id=user_id, api_key=api_key)
+    session = PooledSession(pool_size=pool_size, timeout=(connect_timeout, read_timeout))
+    client.api_client = PooledTopvisorAPI(user_id, api_key, session)
+    client.service_factory = ServiceFactory(client.api_client)
+    return client
@@ -0,0 +1,173 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from config.logger import logger
+from manager import ProjectManager, SheetSyncPlan, SummaryRow, SHEET_NAME
+
+
+class AsyncProjectManager(ProjectManager):
+    """
+    ProjectManager with an asyncio pipeline: fetching, SQLite writes and Google Sheets uploads run as
+    overlapping stages connected by bounded queues, so projects that are already saved are uploaded
+    while others are still being fetched.
+    The Topvisor and Sheets clients are synchronous, so each stage runs them on its own executor:
+    a thread pool for Topvisor requests, one thread for SQLite and one for Sheets.
+    The synchronous run() is inherited unchanged.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        concurrency = self.config.get("concurrency") or {}
+        self.queue_size = max(1, int(concurrency.get("queue_size", 2 * self.workers)))
+
+    async def arun(self, days_back: int = 10, workers: Optional[int] = None, full_rebuild: bool = False,
+                   refetch_stored: bool = False) -> List[Dict]:
+        """
+        Run the entire process for all projects as an async pipeline.
+        Takes the same arguments and returns the same data as ProjectManager.run.
+        :param days_back: Number of days to look back.
+        :param workers: Number of threads for Topvisor requests, defaults to concurrency.workers from settings.
+        :param full_rebuild: Rewrite the whole Google Sheet instead of syncing only the changes.
+        :param refetch_stored: Request summary data for dates already stored in SQLite as well.
+        :return: List of dictionaries containing processed data for all projects, in configuration order.
+        """
+        self.metrics.reset()
+        workers = max(1, workers or self.workers)
+        logger.info("Starting the async pipeline with days_back=%s, workers=%s...", days_back, workers)
+        self.scheduler.start_run()
+        projects = self._collect_projects()
+        self.failures = []
+        results: Dict[int, List[SummaryRow]] = {}
+
+        loop = asyncio.get_running_loop()
+        executors = {
+            "fetch": ThreadPoolExecutor(max_workers=workers, thread_name_prefix="topvisor"),
+            "db": ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite"),
+            "sheets": ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheets"),
+        }
+
+        def runner(name: str) -> Callable:
+            return lambda func, *args: loop.run_in_executor(executors[name], partial(func, *args))
+
+        fetch, db, sheets = runner("fetch"), runner("db"), runner("sheets")
+        save_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        export_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        try:
+            # A sheet that was never synced (or a full rebuild) is written in one pass once all data is saved
+            incremental = not full_rebuild and await db(self.db.get_max_sheet_row, SHEET_NAME) > 0
+            stages = [
+                asyncio.create_task(self._fetch_stage(projects, days_back, refetch_stored, fetch, db, save_queue)),
+                asyncio.create_task(self._write_stage(save_queue, export_queue, db, results, incremental)),
+                asyncio.create_task(self._export_stage(export_queue, db, sheets, full_rebuild)),
+            ]
+            try:
+                await asyncio.gather(*stages)
+            except BaseException:
+                for stage in stages:
+                    stage.cancel()
+                raise
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+
+        all_data = [row._asdict() for index in sorted(results) for row in results[index]]
+        if self.failures:
+            logger.error("%s of %s projects failed: %s", len(self.failures), len(projects), self.failures)
+        logger.info("Process completed. Total records processed: %s", len(all_data))
+        if self.cache:
+            logger.info("Response cache stats: %s", self.cache.stats())
+        logger.info("Request scheduler stats: %s", self.scheduler.stats())
+        self._write_run_metrics(
+            mode="arun", records=len(all_data), failures=self.failures,
+            cache=self.cache.stats() if self.cache else None)
+        return all_data
+
+    async def _fetch_stage(self, projects: List[Dict], days_back: int, refetch_stored: bool,
+                           fetch: Callable, db: Callable, save_queue: asyncio.Queue):
+        """
+        Get dates and summary data of every project and put (index, rows) on the save queue.
+        Projects with the same region and dates are batched like in fetch_and_save; a batch
+        is requested as soon as it is full, the remaining ones after all histories are known.
+        """
+        groups: Dict[tuple, List[tuple]] = {}
+        summaries: List[asyncio.Task] = []
+
+        async def summary(batch: List[tuple]):
+            outcomes = await fetch(
+                self.get_summary_batch, batch[0][1]["region_index"], batch[0][2],
+                [project for index, project, dates in batch])
+            for (index, project, dates), outcome in zip(batch, outcomes):
+                if isinstance(outcome, Exception):
+                    self._record_failure(project, outcome)
+                else:
+                    await save_queue.put((index, outcome))
+
+        async def history(index: int, project: Dict):
+            try:
+                dates = await fetch(
+                    self.get_dates_from_history, project["project_id"], project["region_index"], days_back)
+            except Exception as e:
+                self._record_failure(project, e)
+                return
+            if not refetch_stored:
+                dates = await db(self._missing_dates, project, dates)
+            if not dates:
+                logger.info(
+                    "No new dates for project_id=%s, region_index=%s, skipping summary request.",
+                    project["project_id"], project["region_index"])
+                return
+            key = (project["region_index"], tuple(dates))
+            groups.setdefault(key, []).append((index, project, dates))
+            if len(groups[key]) >= max(1, self.summary_batch_size):
+                summaries.append(asyncio.create_task(summary(groups.pop(key))))
+
+        await asyncio.gather(*(history(index, project) for index, project in enumerate(projects)))
+        summaries.extend(asyncio.create_task(summary(batch)) for batch in groups.values())
+        await asyncio.gather(*summaries)
+        await save_queue.put(None)
+
+    async def _write_stage(self, save_queue: asyncio.Queue, export_queue: asyncio.Queue, db: Callable,
+                           results: Dict[int, List[SummaryRow]], incremental: bool):
+        """
+        Save fetched projects to SQLite on the database thread and notify the export stage.
+        """
+        while (item := await save_queue.get()) is not None:
+            index, rows = item
+            await db(self.save_to_db, rows)
+            results[index] = rows
+            if incremental:
+                await export_queue.put(len(rows))
+        await export_queue.put(None)
+
+    async def _export_stage(self, export_queue: asyncio.Queue, db: Callable, sheets: Callable, full_rebuild: bool):
+        """
+        Upload saved changes to Google Sheets while fetching continues. Notifications that piled up
+        during an upload are merged into one sync round. After the last write the remaining changes
+        (or the whole sheet on a first sync or full rebuild) and the rollup tabs are synced and
+        the local exporters run.
+        """
+        while True:
+            notifications = [await export_queue.get()]
+            while not export_queue.empty():
+                notifications.append(export_queue.get_nowait())
+            if None in notifications:
+                break
+            plan = await db(self._staged, "plan_sheet_sync", self._plan_incremental_sheet_sync)
+            if plan.synced:
+                await sheets(self._staged, "copy_to_google_sheets", self._upload_sheet_sync, plan)
+                await db(self._staged, "commit_sheet_sync", self._commit_sheet_sync, plan)
+
+        # Nothing else uses SQLite or Sheets any more, so the final sync may touch both from one thread
+        await db(self.export, full_rebuild)
+
+    def _plan_incremental_sheet_sync(self) -> SheetSyncPlan:
+        """Plan a sync of everything logged so far below the already synced rows."""
+        until = self.db.get_change_seq()
+        return self._plan_sheet_sync(self.db.get_max_sheet_row(SHEET_NAME), until)
+
+    def _staged(self, stage: str, func: Callable, *args):
+        """Call func, attributing its time and metrics to a stage of the current thread."""
+        with self.metrics.stage(stage):
+            return func(*args)
@@ -0,0 +1,111 @@
+import argparse
+import json
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict
+
+from db.googlesheetwriter import GoogleSheetsManager
+from db.sqlitedb import SQLiteDB
+from fakes.sheets_service import FakeSheetsService
+from fakes.topvisor import FakeTopvisor
+from manager import ProjectManager
+
+
+def make_config(projects: int, workers: int, batch_size: int, chunk_size: int, metrics_path: str) -> Dict:
+    """
+    Build a synthetic configuration with the given number of projects.
+    :param projects: Number of projects.
+    :param workers: Number of worker threads.
+    :param batch_size: Summary batch size.
+    :param chunk_size: Export chunk size.
+    :param metrics_path: Where the run metrics are written.
+    :return: Configuration dictionary accepted by ProjectManager.
+    """
+    return {
+        "projects": [
+            {
+                "project_id": project_id,
+                "region_index": 1 + project_id % 3,
+                "project_name": f"project-{project_id}",
+                "search_engine": "yandex",
+                "region": f"region-{project_id % 3}",
+            }
+            for project_id in range(1, projects + 1)
+        ],
+        "concurrency": {"workers": workers, "max_per_host": workers},
+        "batching": {"summary_batch_size": batch_size},
+        "export": {"chunk_size": chunk_size},
+        "metrics": {"path": metrics_path},
+        # The fake backend has no quota: a production-sized limiter would measure itself, not the pipeline
+        "rate_limit": {"requests_per_second": 1_000_000, "burst": 1_000_000},
+    }
+
+
+def run_benchmark(projects: int = 50, dates: int = 30, latency: float = 0.05, padding_bytes: int = 0,
+                  workers: int = 8, batch_size: int = 10, chunk_size: int = 5000, mode: str = "backfill") -> Dict:
+    """
+    Load projects x dates from the fake Topvisor backend and export them to the fake Sheets backend.
+    :param mode: "backfill" loads the given number of past dates, "run" performs a regular
+                 run with days_back=dates (capped to the 10 latest dates like production runs).
+    :return: Report with end-to-end time, per-stage metrics, peak RSS and SQLite write rate.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config = make_config(projects, workers, batch_size, chunk_size, str(Path(tmp_dir) / "metrics.jsonl"))
+        topvisor = FakeTopvisor(latency=latency, padding_bytes=padding_bytes)
+        db = SQLiteDB(str(Path(tmp_dir) / "bench.db"))
+        sheets = GoogleSheetsManager("", "bench", service=FakeSheetsService())
+        manager = ProjectManager(config, topvisor=topvisor, db=db, google_sheets=sheets)
+
+        started = time.perf_counter()
+        if mode == "run":
+            records = len(manager.run(days_back=dates, workers=workers))
+        else:
+            end_date = datetime.now() - timedelta(days=1)
+            start_date = end_date - timedelta(days=dates - 1)
+            records = manager.backfill(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"),
+                                       chunk_days=dates, workers=workers)
+        elapsed = time.perf_counter() - started
+
+        summary = manager.metrics.summary()
+        save_stage = summary["stages"].get("save_to_db", {})
+        db.close()
+
+    return {
+        "mode": mode,
+        "projects": projects,
+        "dates": dates,
+        "latency": latency,
+        "workers": workers,
+        "records": records,
+        "seconds": round(elapsed, 3),
+        "records_per_second": round(records / elapsed, 1) if elapsed else None,
+        "sqlite_rows_per_second": round(save_stage["rows"] / save_stage["busy_seconds"], 1)
+        if save_stage.get("busy_seconds") else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "api_calls": topvisor.calls,
+        "stages": summary["stages"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ProjectManager against fake Topvisor and Sheets backends.")
+    parser.add_argument("--projects", type=int, default=50, help="Number of synthetic projects.")
+    parser.add_argument("--dates", type=int, default=30, help="Number of dates per project.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated Topvisor latency per request, seconds.")
+    parser.add_argument("--padding-bytes", type=int, default=0, help="Extra bytes added to every Topvisor response.")
+    parser.add_argument("--workers", type=int, default=8, help="Number of worker threads.")
+    parser.add_argument("--batch-size", type=int, default=10, help="Projects per summary request.")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per Sheets export chunk.")
+    parser.add_argument("--mode", choices=["backfill", "run"], default="backfill", help="What to benchmark.")
+    parser.add_argument("--output", help="Append the report as a JSON line to this file.")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.projects, args.dates, args.latency, args.padding_bytes,
+                           args.workers, args.batch_size, args.chunk_size, args.mode)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as file:
+            file.write(json.dumps(report) + "\n")
@@ -0,0 +1,81 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("yaml", "dotenv", "googleapiclient", "google.oauth2", "httplib2", "pytopvisor", "requests",
+                 "multiprocessing")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse the output of python -X importtime.
+    :param stderr: stderr of the interpreter.
+    :return: List of (module, self microseconds, cumulative microseconds) tuples.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure_once(module: str) -> Dict:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+    :param module: Module to import.
+    :return: Wall time of the interpreter, total import time and the loaded heavy modules.
+    """
+    code = (f"import sys, json; import {module}; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+    modules = parse_importtime(result.stderr)
+    return {
+        "wall_ms": wall * 1000,
+        "import_ms": sum(self_us for _, self_us, _ in modules) / 1000,
+        "modules": modules,
+        "heavy_loaded": json.loads(result.stdout.strip().splitlines()[-1]),
+    }
+
+
+def run_startup_benchmark(module: str = "manager", runs: int = 5, top: int = 10) -> Dict:
+    """
+    Measure the cold start of a module: every run is a new interpreter, the first one also
+    pays for cold OS file caches and bytecode compilation.
+    :param module: Module to import.
+    :param runs: Number of interpreter starts.
+    :param top: Number of slowest imports to report.
+    :return: Report with median and first-run times and the slowest imports of the last run.
+    """
+    measurements = [measure_once(module) for _ in range(runs)]
+    last = measurements[-1]
+    slowest = sorted(last["modules"], key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "runs": runs,
+        "first_wall_ms": round(measurements[0]["wall_ms"], 1),
+        "median_wall_ms": round(statistics.median(m["wall_ms"] for m in measurements), 1),
+        "median_import_ms": round(statistics.median(m["import_ms"] for m in measurements), 1),
+        "heavy_loaded": last["heavy_loaded"],
+        "slowest_imports_ms": {name: round(self_us / 1000, 2) for name, self_us, _ in slowest},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import time of manager.py with python -X importtime.")
+    parser.add_argument("--module", default="manager", help="Module to import.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreter starts.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to report.")
+    args = parser.parse_args()
+
+    print(json.dumps(run_startup_benchmark(args.module, args.runs, args.top), indent=2))
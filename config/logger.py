@@ -1,6 +1,109 @@
 import os
+import json
+import atexit
 import logging
+import reprlib
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from queue import SimpleQueue
+from typing import Dict, Optional
+
+# Поля project_id и stage текущего потока или задачи asyncio, добавляемые в каждую запись
+_log_context: contextvars.ContextVar = contextvars.ContextVar("log_context", default={})
+
+# Сокращённое представление больших ответов API в сообщениях
+_payload_repr = reprlib.Repr()
+_payload_repr.maxlevel = 3
+_payload_repr.maxdict = 10
+_payload_repr.maxlist = 10
+_payload_repr.maxstring = 200
+_payload_repr.maxother = 200
+
+DEFAULT_SETTINGS = {
+    "level": "INFO",
+    "console_level": "INFO",
+    "format": "text",
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    "max_message_chars": 2000,
+}
+
+
+class brief:
+    """
+    Ленивое сокращённое представление объекта для сообщений лога:
+    logger.debug("Response: %s", brief(response)). Строка строится, только если запись
+    действительно пишется, и не длиннее нескольких сотен символов.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return _payload_repr.repr(self.value)
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    Добавляет поля (например, project_id и stage) ко всем записям внутри блока.
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Переносит поля log_context в запись; поля, переданные через extra, имеют приоритет.
+    """
+
+    def filter(self, record):
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class TruncatingQueueHandler(QueueHandler):
+    """
+    Неблокирующий обработчик: запись форматируется, обрезается и кладётся в очередь,
+    а в файл и консоль её пишет поток QueueListener.
+    """
+
+    def __init__(self, queue, max_message_chars: int = 2000):
+        super().__init__(queue)
+        self.max_message_chars = max_message_chars
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        if self.max_message_chars and len(record.msg) > self.max_message_chars:
+            cut = len(record.msg) - self.max_message_chars
+            record.msg = f"{record.msg[:self.max_message_chars]}... [обрезано {cut} символов]"
+            record.message = record.msg
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Запись в виде одной строки JSON с полями project_id и stage.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "project_id": getattr(record, "project_id", None),
+            "stage": getattr(record, "stage", None),
+            "thread": record.threadName,
+        }
+        return json.dumps(entry, ensure_ascii=False, default=str)
 
 
 class Logger:
@@ -17,30 +120,75 @@ class Logger:
         Настройка логгера.
         """
         self.logger = logging.getLogger("TopvisorLogger")
-        self.logger.setLevel(logging.DEBUG)
+        self.log_file = log_file
+        self.listener: Optional[QueueListener] = None
+        self.settings = dict(DEFAULT_SETTINGS)
 
         # Проверяем, есть ли уже обработчики
         if not self.logger.handlers:
-            # Создание директории для логов, если её нет
-            logs_dir = Path(__file__).resolve().parent.parent / "logs"
-            logs_dir.mkdir(exist_ok=True)
+            self.configure()
+            atexit.register(self._stop)
+            # В дочернем процессе (шарды) поток записи нужно запустить заново
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=self._restart_after_fork)
 
-            # Формат логов
-            formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-
-            # Логирование в файл
-            file_handler = logging.FileHandler(logs_dir / log_file, encoding="utf-8")
-            file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(formatter)
-
-            # Логирование в консоль
-            console_handler = logging.StreamHandler()
-            console_handler.setLevel(logging.INFO)
-            console_handler.setFormatter(formatter)
+    def configure(self, settings: Optional[Dict] = None):
+        """
+        Применяет настройки логирования (секция logging в settings.yaml):
+        level и console_level, format (text или json для файла), max_bytes и backup_count
+        для ротации файла, max_message_chars для обрезки длинных сообщений.
+        """
+        self.settings = {**self.settings, **(settings or {})}
+        self._stop()
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+
+        # Создание директории для логов, если её нет
+        logs_dir = Path(__file__).resolve().parent.parent / "logs"
+        logs_dir.mkdir(exist_ok=True)
+
+        # Формат логов
+        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+
+        # Логирование в файл с ротацией по размеру; файл открывается при первой записи
+        file_handler = RotatingFileHandler(
+            logs_dir / self.log_file, encoding="utf-8", delay=True,
+            maxBytes=int(self.settings["max_bytes"]), backupCount=int(self.settings["backup_count"]))
+        file_handler.setLevel(self.settings["level"])
+        file_handler.setFormatter(JsonFormatter() if self.settings["format"] == "json" else formatter)
+
+        # Логирование в консоль
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(self.settings["console_level"])
+        console_handler.setFormatter(formatter)
+
+        # Записи уходят в очередь, файл и консоль пишет отдельный поток
+        queue = SimpleQueue()
+        queue_handler = TruncatingQueueHandler(queue, int(self.settings["max_message_chars"]))
+        queue_handler.addFilter(ContextFilter())
+        self.logger.addHandler(queue_handler)
+        # Уровень логгера отсекает ненужные записи до форматирования сообщения
+        self.logger.setLevel(min(file_handler.level, console_handler.level))
+
+        self.listener = QueueListener(queue, file_handler, console_handler, respect_handler_level=True)
+        self.listener.start()
+
+    def _stop(self):
+        """
+        Дописывает записи из очереди и останавливает поток записи.
+        """
+        if self.listener:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
 
-            # Добавление обработчиков
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(console_handler)
+    def _restart_after_fork(self):
+        """
+        Поток записи родителя в дочернем процессе не существует: запускаем свой.
+        """
+        self.listener = None
+        self.configure()
 
     def get_logger(self):
         """
@@ -61,13 +209,13 @@ def debug(func):
     def wrapper(*args, **kwargs):
         logger = Logger().get_logger()
         func_name = func.__name__
-        logger.debug(f"Выполнение функции '{func_name}' начато.")
+        logger.debug("Выполнение функции '%s' начато.", func_name)
         try:
             result = func(*args, **kwargs)
-            logger.debug(f"Функция '{func_name}' успешно завершена.")
+            logger.debug("Функция '%s' успешно завершена.", func_name)
             return result
         except Exception as e:
-            logger.error(f"Ошибка в функции '{func_name}': {e}")
+            logger.error("Ошибка в функции '%s': %s", func_name, e)
             raise
 
     return wrapper
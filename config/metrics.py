@@ -0,0 +1,175 @@
+import functools
+import inspect
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from config.logger import log_context
+
+
+class RunMetrics:
+    """
+    Collects wall time, call counts, bytes and rows per stage and per project during a run.
+    Thread-safe: stages may run concurrently in worker threads. "seconds" is the wall time from the
+    first start to the last end of a stage, "busy_seconds" the time summed over all its calls,
+    which exceeds the wall time when calls overlap in several threads.
+    """
+
+    FIELDS = ("calls", "errors", "seconds", "busy_seconds", "rows", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Start collecting metrics for a new run."""
+        with self._lock:
+            self.run_id = uuid.uuid4().hex
+            self.started_at = datetime.now().isoformat(timespec="seconds")
+            self._started = time.perf_counter()
+            self.stages: Dict[str, Dict[str, float]] = {}
+            self.projects: Dict[str, Dict[str, Dict[str, float]]] = {}
+            # [first start, last end] of every stage bucket, keyed like the buckets
+            self._spans: Dict[tuple, list] = {}
+
+    def _bucket(self, stage: str, project_id: Optional[int]) -> list:
+        buckets = [((stage, None), self.stages.setdefault(stage, dict.fromkeys(self.FIELDS, 0)))]
+        if project_id is not None:
+            buckets.append(((stage, str(project_id)), self.projects.setdefault(str(project_id), {}).setdefault(
+                stage, dict.fromkeys(self.FIELDS, 0))))
+        return buckets
+
+    @contextmanager
+    def stage(self, stage: str, project_id: Optional[int] = None):
+        """
+        Time a stage; add() calls made inside it are attributed to it, and log records
+        written inside it carry its stage and project_id fields.
+        :param stage: Name of the stage.
+        :param project_id: ID of the project the stage works on, if any.
+        """
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append((stage, project_id))
+        started = time.perf_counter()
+        failed = False
+        fields = {"stage": stage} if project_id is None else {"stage": stage, "project_id": project_id}
+        try:
+            with log_context(**fields):
+                yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            stack.pop()
+            ended = time.perf_counter()
+            with self._lock:
+                for key, bucket in self._bucket(stage, project_id):
+                    span = self._spans.setdefault(key, [started, ended])
+                    span[0], span[1] = min(span[0], started), max(span[1], ended)
+                    bucket["calls"] += 1
+                    bucket["errors"] += int(failed)
+                    bucket["seconds"] = span[1] - span[0]
+                    bucket["busy_seconds"] += ended - started
+
+    def add(self, rows: int = 0, bytes_in: int = 0, bytes_out: int = 0,
+            stage: Optional[str] = None, project_id: Optional[int] = None):
+        """
+        Add counters to a stage, by default to the innermost stage running in this thread.
+        :param rows: Number of rows processed.
+        :param bytes_in: Number of bytes received.
+        :param bytes_out: Number of bytes sent.
+        :param stage: Name of the stage.
+        :param project_id: ID of the project.
+        """
+        stack = self._local.__dict__.get("stack") or [("unstaged", None)]
+        if stage is None:
+            stage, current_project_id = stack[-1]
+            project_id = current_project_id if project_id is None else project_id
+        with self._lock:
+            for key, bucket in self._bucket(stage, project_id):
+                bucket["rows"] += rows
+                bucket["bytes_in"] += bytes_in
+                bucket["bytes_out"] += bytes_out
+
+    def merge(self, summary: Dict):
+        """
+        Add the stage and project metrics of another run summary, e.g. of a worker process.
+        Counters are summed; the wall time of a stage is the longest of the merged ones,
+        since the merged runs overlap.
+        :param summary: Summary built by summary() of the other RunMetrics.
+        """
+        with self._lock:
+            merged = [((stage, None), values) for stage, values in summary.get("stages", {}).items()]
+            merged.extend(((stage, project_id), values) for project_id, stages in summary.get("projects", {}).items()
+                          for stage, values in stages.items())
+            for (stage, project_id), values in merged:
+                if project_id is None:
+                    bucket = self.stages.setdefault(stage, dict.fromkeys(self.FIELDS, 0))
+                else:
+                    bucket = self.projects.setdefault(project_id, {}).setdefault(stage, dict.fromkeys(self.FIELDS, 0))
+                for field in self.FIELDS:
+                    if field == "seconds":
+                        bucket[field] = max(bucket[field], values.get(field, 0))
+                    else:
+                        bucket[field] += values.get(field, 0)
+
+    def summary(self, **extra) -> Dict:
+        """
+        Build the machine-readable summary of the run.
+        :param extra: Additional fields, e.g. failures or cache stats.
+        :return: Dictionary with run-level, per-stage and per-project metrics.
+        """
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "started_at": self.started_at,
+                "seconds": round(time.perf_counter() - self._started, 3),
+                "stages": {stage: self._rounded(values) for stage, values in self.stages.items()},
+                "projects": {
+                    project_id: {stage: self._rounded(values) for stage, values in stages.items()}
+                    for project_id, stages in self.projects.items()
+                },
+                **extra,
+            }
+
+    @staticmethod
+    def _rounded(values: Dict[str, float]) -> Dict[str, float]:
+        return {key: round(value, 3) if isinstance(value, float) else value for key, value in values.items()}
+
+    def write(self, path: str, **extra) -> Dict:
+        """
+        Append the run summary as one JSON line.
+        :param path: Path to the JSON lines file.
+        :param extra: Additional fields for the summary.
+        :return: The written summary.
+        """
+        summary = self.summary(**extra)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(summary, ensure_ascii=False, default=str) + "\n")
+        return summary
+
+
+def instrumented(stage: str):
+    """
+    Decorator timing a ProjectManager method as a metrics stage.
+    The project_id argument of the method, if any, is used for per-project metrics.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            project_id = signature.bind_partial(self, *args, **kwargs).arguments.get("project_id")
+            with self.metrics.stage(stage, project_id):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,9 +1,7 @@
 import os
-import yaml
 from pathlib import Path
-from dotenv import load_dotenv
 from typing import Any
-from config.logger import logger
+from config.logger import Logger, brief, logger
 
 class EnvLoader:
     def __init__(self, env_path: Path):
@@ -13,6 +11,7 @@ class EnvLoader:
 
     def load(self):
         if self.env_path.exists():
+            from dotenv import load_dotenv
             load_dotenv(self.env_path)
             self.data = {key: os.getenv(key) for key in os.environ}
 
@@ -24,6 +23,7 @@ class YAMLLoader:
 
     def load(self):
         if self.yaml_path.exists():
+            import yaml
             with open(self.yaml_path, "r", encoding="utf-8") as file:
                 self.data = yaml.safe_load(file)
         else:
@@ -52,9 +52,27 @@ class Config:
             "user_id": env_loader.data.get("USER_ID"),
             "google_sheets": env_loader.data.get("GOOGLE_SHEETS_ID"),
             "service_file": env_loader.data.get("SERVICE_FILE_NAME"),
+            "postgres_dsn": env_loader.data.get("POSTGRES_DSN"),
             "projects": yaml_loader.data.get("projects", {}),
+            "concurrency": yaml_loader.data.get("concurrency", {}),
+            "cache": yaml_loader.data.get("cache", {}),
+            "batching": yaml_loader.data.get("batching", {}),
+            "backfill": yaml_loader.data.get("backfill", {}),
+            "export": yaml_loader.data.get("export", {}),
+            "metrics": yaml_loader.data.get("metrics", {}),
+            "rate_limit": yaml_loader.data.get("rate_limit", {}),
+            "sqlite": yaml_loader.data.get("sqlite", {}),
+            "rollups": yaml_loader.data.get("rollups", {}),
+            "http": yaml_loader.data.get("http", {}),
+            "keywords": yaml_loader.data.get("keywords", {}),
+            "exporters": yaml_loader.data.get("exporters", {}),
+            "logging": yaml_loader.data.get("logging", {}),
+            "daemon": yaml_loader.data.get("daemon", {}),
+            "database": yaml_loader.data.get("database", {}),
+            "postgres": yaml_loader.data.get("postgres", {}),
         }
-        logger.debug(f"Configuration loaded: {self._data}")
+        Logger().configure(self._data["logging"])
+        logger.debug("Configuration loaded: %s", brief(self._data))
         self.validate()
         logger.info("Configuration validated successfully.")
 
@@ -64,6 +82,10 @@ class Config:
             if field not in self._data or not self._data[field]:
                 raise ValueError(f"Missing or empty required field: {field}")
 
+    def to_dict(self) -> dict:
+        """Get a plain copy of the configuration, e.g. to hand it to worker processes."""
+        return dict(self._data)
+
     def get(self, key, default=None):
         return self._data.get(key, default)
 
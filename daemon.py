@@ -0,0 +1,131 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from config.logger import logger
+from manager import ProjectManager, SummaryRow
+
+
+class DaemonProjectManager(ProjectManager):
+    """
+    Long-running ProjectManager: the Topvisor session, the SQLite connection, the response cache and
+    the Sheets client stay open between cycles instead of being created by every cron run.
+    Each project is polled on its own cadence (refresh_minutes of its entry in settings.yaml,
+    daemon.refresh_minutes by default) with a get_history request over the last daemon.days_back days.
+    Summary data is requested only for dates that appeared since the previous poll. Today's checks may
+    still be running, so today is requested again every daemon.today_refresh_minutes, and once more
+    after midnight to get its final data; Google Sheets and the local exporters are synced only after
+    saved rows changed the database.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        settings = self.config.get("daemon") or {}
+        self.refresh_minutes = float(settings.get("refresh_minutes", 15))
+        self.poll_days_back = int(settings.get("days_back", 2))
+        self.today_refresh_minutes = float(settings.get("today_refresh_minutes", 60))
+        # Dates seen in the last poll of each (project_id, region_index) and already stored
+        self._seen_dates: Dict[Tuple[int, int], Set[str]] = {}
+        # Date last requested as today and when, per (project_id, region_index)
+        self._today_refreshed: Dict[Tuple[int, int], Tuple[str, float]] = {}
+        self._export_pending = False
+        self._stopped = threading.Event()
+
+    def stop(self):
+        """Stop run_forever after the current cycle; safe to call from signal handlers and other threads."""
+        self._stopped.set()
+
+    def run_forever(self, workers: Optional[int] = None, max_cycles: Optional[int] = None) -> int:
+        """
+        Poll projects when they are due until stop() is called.
+        A failing cycle is logged and the projects are polled again at their next due time.
+        :param workers: Number of worker threads per cycle, defaults to concurrency.workers from settings.
+        :param max_cycles: Stop after this many cycles, runs until stopped by default.
+        :return: Number of cycles run.
+        """
+        projects = self._collect_projects()
+        intervals = [
+            float(project.get("refresh_minutes", self.refresh_minutes)) * 60
+            for project in self.config.get("projects", [])
+        ]
+        next_due = [0.0] * len(projects)
+        cycles = 0
+        logger.info("Daemon started for %d projects, polling the last %d days.", len(projects), self.poll_days_back)
+        while not self._stopped.is_set() and (max_cycles is None or cycles < max_cycles):
+            started = time.monotonic()
+            due = [index for index, due_at in enumerate(next_due) if due_at <= started]
+            if due:
+                try:
+                    self.run_cycle([projects[index] for index in due], workers)
+                except Exception as e:
+                    logger.error("Daemon cycle failed: %s", e)
+                cycles += 1
+                for index in due:
+                    next_due[index] = started + intervals[index]
+                if max_cycles is not None and cycles >= max_cycles:
+                    break
+            self._stopped.wait(max(0.0, min(next_due) - time.monotonic()))
+        logger.info("Daemon stopped after %d cycles.", cycles)
+        return cycles
+
+    def run_cycle(self, projects: List[Dict], workers: Optional[int] = None) -> int:
+        """
+        Poll the given projects once, save new dates and export if anything changed.
+        :param projects: Projects as returned by _collect_projects.
+        :param workers: Number of worker threads, defaults to concurrency.workers from settings.
+        :return: Number of rows saved.
+        """
+        self.metrics.reset()
+        seq = self.db.get_change_seq()
+        saved = self.fetch_and_save(self.poll_days_back, workers, projects=projects)
+        # Today's rows are saved on every poll; only rows that changed something are exported.
+        # An export that failed is retried on the next cycle even without changes
+        self._export_pending = self._export_pending or self.db.get_change_seq() != seq
+        if self._export_pending:
+            self.export()
+            self._export_pending = False
+        if saved or self.failures:
+            self._write_run_metrics(
+                mode="daemon", records=len(saved), failures=self.failures,
+                cache=self.cache.stats() if self.cache else None)
+        return len(saved)
+
+    def _missing_dates(self, project: Dict, dates: List[str]) -> List[str]:
+        """
+        Keep only the dates that appeared since the previous poll of the project, plus today's date
+        when its refresh interval has passed and the previous day once after midnight.
+        The first poll behaves like a normal run: stored dates are skipped, today's date is kept.
+        """
+        key = (project["project_id"], project["region_index"])
+        today = datetime.now().strftime("%Y-%m-%d")
+        seen = self._seen_dates.get(key)
+        if seen is None:
+            missing = super()._missing_dates(project, dates)
+            self._seen_dates[key] = set(dates) - set(missing)
+        else:
+            # Dates that left the polling window are forgotten, the set stays small
+            seen = self._seen_dates[key] = seen & set(dates)
+            refresh = {date for date in dates if date not in seen}
+            last_date, last_at = self._today_refreshed.get(key, (None, 0.0))
+            if last_date is not None and last_date != today and last_date in seen:
+                # The day last refreshed as today is over, its checks have finished
+                refresh.add(last_date)
+            elif today in seen and time.monotonic() - last_at >= self.today_refresh_minutes * 60:
+                # Today's checks may still be running, its partial data is refetched now and then
+                refresh.add(today)
+            missing = [date for date in dates if date in refresh]
+        if today in missing:
+            self._today_refreshed[key] = (today, time.monotonic())
+        elif self._today_refreshed.get(key, (today,))[0] != today:
+            self._today_refreshed.pop(key)
+        return missing
+
+    def save_to_db(self, data: List[SummaryRow]):
+        """
+        Save data to SQLite and mark its dates as seen; dates whose summary request failed stay
+        unseen and are requested again on the next poll.
+        """
+        super().save_to_db(data)
+        for row in data:
+            self._seen_dates.setdefault((row.project_id, row.region_index), set()).add(row.date)
@@ -0,0 +1,136 @@
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from config.logger import logger
+from db.exporter_interface import ExporterInterface
+
+FORMATS = {"parquet": ".parquet", "csv": ".csv.gz"}
+
+
+class ColumnarExporter(ExporterInterface):
+    def __init__(self, path: str = "export", file_format: str = "parquet", table_name: str = "project_data",
+                 columns: Optional[List[str]] = None, compression: Optional[str] = None,
+                 chunk_size: int = 50000, name: str = "columnar"):
+        """
+        Export a table with the (date, project_id, region_index) key into local files partitioned
+        by month and project (<path>/<table>/month=YYYY-MM/project_id=N/), readable by pandas,
+        pyarrow, DuckDB or BI tools as one hive-partitioned dataset. Both formats leave project_id
+        out of the files, since it comes from the partition directory.
+        The first run writes the whole table; later runs read the change log after the exporter's
+        cursor and rewrite only the partitions with changed rows, so backfilled dates and corrected
+        values reach the files as well.
+        :param path: Output directory.
+        :param file_format: "parquet" (needs pyarrow) or "csv" (gzip-compressed).
+        :param table_name: Table to export.
+        :param columns: Columns to export, all columns by default.
+        :param compression: Parquet compression codec, "snappy" by default.
+        :param chunk_size: Rows read from the database and written per part file at most.
+        :param name: Exporter name, keys its change log cursor.
+        """
+        if file_format not in FORMATS:
+            raise ValueError(f"Unsupported export format '{file_format}', expected one of {sorted(FORMATS)}.")
+        self.path = Path(path)
+        self.file_format = file_format
+        self.table_name = table_name
+        self.columns = columns
+        self.compression = compression or "snappy"
+        self.chunk_size = chunk_size
+        self.name = name
+
+    @property
+    def consumer(self) -> str:
+        """Change log consumer name of the exporter."""
+        return f"export:{self.name}"
+
+    def export(self, db, full_rebuild: bool = False) -> int:
+        """
+        Rewrite the partitions changed since the exporter's cursor, or all of them on the first run.
+        :param db: Database to read from.
+        :param full_rebuild: Delete the exported files and export the whole table again.
+        :return: Number of rows written.
+        """
+        table_dir = self.path / self.table_name
+        columns = self.columns or db.get_columns(self.table_name)
+        # Changes logged while exporting are left for the next run
+        until = db.get_change_seq()
+        since = None if full_rebuild else db.get_cursor(self.consumer)
+
+        if since is None:
+            shutil.rmtree(table_dir, ignore_errors=True)
+            written = self._write_rows(db.iter_rows(
+                self.table_name, columns=columns, order_by="project_id, region_index, date",
+                chunk_size=self.chunk_size), columns, lambda month, project_id: self._partition_dir(
+                table_dir, month, project_id))
+            logger.info("%s export of %s to %s: %d rows written.", self.file_format, self.table_name, table_dir, written)
+        else:
+            partitions = sorted({
+                (date[:7], project_id)
+                for chunk in db.iter_changes(since, until, self.table_name, self.chunk_size)
+                for seq, date, project_id, region_index, op in chunk
+            })
+            written = sum(self._rewrite_partition(db, columns, table_dir, month, project_id)
+                          for month, project_id in partitions)
+            logger.info("%s export of %s to %s: %d partitions rewritten, %d rows.",
+                        self.file_format, self.table_name, table_dir, len(partitions), written)
+
+        db.save_cursor(self.consumer, until)
+        db.prune_change_log()
+        return written
+
+    def _rewrite_partition(self, db, columns: List[str], table_dir: Path, month: str, project_id: int) -> int:
+        """
+        Replace the files of one month and project with the rows currently stored.
+        The new files are written next to the partition first, so readers never see it half-written.
+        """
+        directory = self._partition_dir(table_dir, month, project_id)
+        # Hive-partitioned readers skip directories starting with a dot
+        staging = directory.with_name(f".{directory.name}")
+        shutil.rmtree(staging, ignore_errors=True)
+        first_day = datetime.strptime(month, "%Y-%m")
+        next_month = (first_day + timedelta(days=32)).replace(day=1)
+        written = self._write_rows(db.iter_rows(
+            self.table_name, filters={"project_id": project_id}, columns=columns,
+            order_by="region_index, date", chunk_size=self.chunk_size,
+            after=(first_day - timedelta(days=1)).strftime("%Y-%m-%d"), before=next_month.strftime("%Y-%m-%d")),
+            columns, lambda *partition: staging)
+        shutil.rmtree(directory, ignore_errors=True)
+        if written:
+            staging.rename(directory)
+        return written
+
+    @staticmethod
+    def _partition_dir(table_dir: Path, month: str, project_id: int) -> Path:
+        return table_dir / f"month={month}" / f"project_id={project_id}"
+
+    def _write_rows(self, chunks, columns: List[str], partition_dir: Callable[[str, int], Path]) -> int:
+        """
+        Write row chunks ordered by project, region and date as part files.
+        :param chunks: Chunks of row tuples in column order.
+        :param partition_dir: Directory of the part files of a month and project.
+        :return: Number of rows written.
+        """
+        import pandas as pd
+
+        written = 0
+        for chunk in chunks:
+            frame = pd.DataFrame.from_records(chunk, columns=columns)
+            for (month, project_id, region_index), part in frame.groupby(
+                    [frame["date"].str[:7], "project_id", "region_index"], sort=False):
+                self._write_part(part, partition_dir(month, project_id), region_index)
+            written += len(frame)
+        return written
+
+    def _write_part(self, frame, directory: Path, region_index: int):
+        """
+        Write one part file; its name is derived from the rows, so a retried export overwrites it.
+        project_id comes from the partition directory, as hive-partitioned readers expect.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        file_name = f"part-{region_index}-{frame['date'].iloc[0]}-{frame['date'].iloc[-1]}{FORMATS[self.file_format]}"
+        frame = frame.drop(columns="project_id")
+        if self.file_format == "parquet":
+            frame.to_parquet(directory / file_name, index=False, compression=self.compression)
+        else:
+            frame.to_csv(directory / file_name, index=False, compression="gzip")
@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 
 class DatabaseInterface(ABC):
+    # True if several processes may write at once; sharded runs then write to the database directly
+    concurrent_writers: bool = False
+
     @abstractmethod
     def create(self, table_name: str, data: Dict):
         """Insert a new record into the specified table."""
@@ -21,4 +24,131 @@ class DatabaseInterface(ABC):
     @abstractmethod
     def delete(self, table_name: str, filters: Dict):
         """Delete records from the specified table."""
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def get_columns(self, table_name: str) -> List[str]:
+        """Get the column names of a table, in table order."""
+        pass
+
+    @abstractmethod
+    def get_stored_dates(self, table_name: str, project_id: int, region_index: int,
+                         since: Optional[str] = None) -> Set[str]:
+        """Get the dates already stored for a project and region."""
+        pass
+
+    def bulk_upsert(self, table_name: str, records: List[Dict],
+                    key_columns: Tuple[str, ...] = ("date", "project_id", "region_index")) -> Dict[str, int]:
+        """
+        Insert or update a batch of records in a single transaction.
+        Existing rows are overwritten only when at least one value differs.
+        :param table_name: Name of the table.
+        :param records: List of dictionaries with the same column-value pairs.
+        :param key_columns: Columns of the table's primary key used as the conflict target.
+        :return: Dictionary with the number of rows inserted, updated and unchanged.
+        """
+        if not records:
+            return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        columns = list(records[0].keys())
+        return self.bulk_upsert_rows(
+            table_name, columns, [[record[column] for column in columns] for record in records], key_columns)
+
+    @abstractmethod
+    def bulk_upsert_rows(self, table_name: str, columns: List[str], rows: Sequence[Sequence],
+                         key_columns: Tuple[str, ...] = ("date", "project_id", "region_index")) -> Dict[str, int]:
+        """Insert or update plain rows in one transaction, overwriting rows only when a value differs."""
+        pass
+
+    @abstractmethod
+    def update_rollups(self, keys: Iterable[Tuple[int, int, str]]):
+        """Recompute the rollup periods touched by the given (project_id, region_index, date) rows."""
+        pass
+
+    @abstractmethod
+    def rebuild_rollups(self):
+        """Recompute all rollup tables from project_data."""
+        pass
+
+    @abstractmethod
+    def iter_rows(self, table_name: str, filters: Optional[Dict] = None, columns: Optional[List[str]] = None,
+                  order_by: Optional[str] = None, chunk_size: int = 5000, after: Optional[str] = None,
+                  before: Optional[str] = None) -> Iterator[List[Tuple]]:
+        """Stream records from a table in chunks of row tuples."""
+        pass
+
+    @abstractmethod
+    def get_change_seq(self) -> int:
+        """Get the sequence number of the latest change_log entry."""
+        pass
+
+    @abstractmethod
+    def iter_changes(self, since: int, until: Optional[int] = None, table_name: str = "project_data",
+                     chunk_size: int = 5000) -> Iterator[List[Tuple[int, str, int, int, str]]]:
+        """Stream the change_log entries of a table after a cursor, in sequence order."""
+        pass
+
+    @abstractmethod
+    def get_cursor(self, consumer: str) -> Optional[int]:
+        """Get the change_log position a consumer has processed up to."""
+        pass
+
+    @abstractmethod
+    def save_cursor(self, consumer: str, seq: int):
+        """Store the change_log position a consumer has processed up to."""
+        pass
+
+    @abstractmethod
+    def prune_change_log(self, consumers: Optional[List[str]] = None) -> int:
+        """Delete the change_log entries the given consumers (all if None) have processed and return their number."""
+        pass
+
+    @abstractmethod
+    def get_max_sheet_row(self, sheet_name: str) -> int:
+        """Get the last sheet row synced to a Google Sheet."""
+        pass
+
+    @abstractmethod
+    def iter_sync_rows(self, sheet_name: str, table_name: str, columns: List[str],
+                       chunk_size: int = 5000, since: Optional[int] = None,
+                       until: Optional[int] = None) -> Iterator[List[Tuple]]:
+        """Stream table rows followed by their sheet_row and row_hash for a Google Sheet."""
+        pass
+
+    @abstractmethod
+    def save_sync_state(self, sheet_name: str, entries: List[Tuple[str, int, int, int, str]]):
+        """Store the sheet position and hash of synced rows."""
+        pass
+
+    @abstractmethod
+    def reset_sync_state(self, sheet_name: str):
+        """Forget everything synced to a Google Sheet."""
+        pass
+
+    @abstractmethod
+    def get_completed_chunks(self, project_id: int, region_index: int) -> Set[Tuple[str, str]]:
+        """Get the backfill chunks already loaded for a project."""
+        pass
+
+    @abstractmethod
+    def mark_chunk_completed(self, project_id: int, region_index: int, chunk_start: str, chunk_end: str):
+        """Checkpoint a loaded backfill chunk."""
+        pass
+
+    @abstractmethod
+    def save_keyword_positions(self, project_id: int, region_index: int,
+                               rows: Sequence[Tuple[int, str, str, Optional[int]]]) -> int:
+        """Store a page of (keyword_id, name, date, position) rows and return the number of positions changed."""
+        pass
+
+    @abstractmethod
+    def get_top_movers(self, project_id: int, region_index: int, date_from: str, date_to: str,
+                       limit: int = 10, direction: str = "both",
+                       missing_position: int = 101) -> List[Tuple[int, str, Optional[int], Optional[int], int]]:
+        """Get the keywords whose positions changed the most between two dates."""
+        pass
+
+    @abstractmethod
+    def close(self):
+        """Close the database connections."""
+        pass
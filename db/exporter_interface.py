@@ -0,0 +1,14 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class ExporterInterface(ABC):
+    # Name used for the exporter's metrics stage and its stored export state
+    name: str = "exporter"
+    # Change log consumer name of exporters that follow the change log with a cursor
+    consumer: Optional[str] = None
+
+    @abstractmethod
+    def export(self, db, full_rebuild: bool = False) -> int:
+        """Export data not exported yet from the database and return the number of rows written."""
+        pass
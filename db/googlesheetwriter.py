@@ -1,30 +1,55 @@
 import os
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from typing import List, Dict
+import json
+import random
+import time
+from typing import List, Dict, Optional, Tuple
+from api.scheduler import RETRYABLE_STATUSES
+from config.logger import logger
 
 
 class GoogleSheetsManager:
-    def __init__(self, credentials_path: str, spreadsheet_id: str):
+    def __init__(self, credentials_path: str, spreadsheet_id: str, service=None,
+                 max_payload_bytes: int = 2_000_000, max_retries: int = 5, backoff_base: float = 1.0,
+                 timeout: float = 120):
         """
         Initialize the Google Sheets Manager.
         :param credentials_path: Path to the service account credentials JSON file.
         :param spreadsheet_id: ID of the Google Sheets document.
+        :param service: Ready Sheets API service object, e.g. a local stand-in; skips credential loading.
+        :param max_payload_bytes: Maximum size of a single batch_write request body.
+        :param max_retries: Retries of a batch_write chunk on 429/5xx responses and timeouts.
+        :param backoff_base: Initial backoff delay in seconds, doubled on every retry.
+        :param timeout: Socket timeout of Sheets API requests in seconds.
         """
         self.spreadsheet_id = spreadsheet_id
-        self.service = self._initialize_service(credentials_path)
+        self.max_payload_bytes = max_payload_bytes
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.service = service or self._initialize_service(credentials_path, timeout)
 
-    def _initialize_service(self, credentials_path: str):
+    def _initialize_service(self, credentials_path: str, timeout: float = 120):
         """
         Initialize the Google Sheets API service.
+        All requests go through one authorized httplib2 connection that is kept alive between calls.
+        The discovery document bundled with googleapiclient is used (static_discovery), so startup
+        never fetches it over the network.
         :param credentials_path: Path to the service account credentials JSON file.
+        :param timeout: Socket timeout in seconds.
         :return: Google Sheets API service object.
         """
+        # Heavy Google client libraries are loaded here, not at import time, so that
+        # importing this module (e.g. with an injected service) stays cheap
+        import google_auth_httplib2
+        import httplib2
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+
         scopes = ["https://www.googleapis.com/auth/spreadsheets"]
         credentials = service_account.Credentials.from_service_account_file(
             credentials_path, scopes=scopes
         )
-        return build("sheets", "v4", credentials=credentials)
+        http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(timeout=timeout))
+        return build("sheets", "v4", http=http, static_discovery=True, cache_discovery=False)
 
     def read(self, sheet_name: str, range_name: str) -> List[List[str]]:
         """
@@ -58,6 +83,91 @@ class GoogleSheetsManager:
             body=body,
         ).execute()
 
+    def batch_write(self, sheet_name: str, ranges: List[Tuple[int, List[List]]]) -> List[Dict]:
+        """
+        Write several row ranges with values().batchUpdate, split into payloads of bounded size.
+        Each payload is retried with exponential backoff on 429/5xx responses and timeouts.
+        :param sheet_name: Name of the sheet.
+        :param ranges: List of (start_row, rows) tuples, rows being written starting at column A of start_row.
+        :return: List of per-chunk reports with the number of rows, bytes and attempts.
+        """
+        reports = []
+        for payload in self._split_payloads(sheet_name, ranges):
+            body = {"valueInputOption": "RAW", "data": payload}
+            size = len(json.dumps(body, default=str).encode("utf-8"))
+            rows = sum(len(value_range["values"]) for value_range in payload)
+            attempts = self._execute_with_retry(
+                lambda: self.service.spreadsheets().values().batchUpdate(
+                    spreadsheetId=self.spreadsheet_id, body=body
+                ).execute()
+            )
+            report = {"ranges": len(payload), "rows": rows, "bytes": size, "attempts": attempts}
+            logger.debug("Google Sheets chunk written: %s", report)
+            reports.append(report)
+        return reports
+
+    def _split_payloads(self, sheet_name: str, ranges: List[Tuple[int, List[List]]]) -> List[List[Dict]]:
+        """
+        Pack row ranges into batchUpdate payloads not exceeding max_payload_bytes.
+        A range larger than the limit is cut into several consecutive ranges.
+        :param sheet_name: Name of the sheet.
+        :param ranges: List of (start_row, rows) tuples.
+        :return: List of payloads, each a list of ValueRange dictionaries.
+        """
+        payloads = []
+        payload = []
+        payload_size = 0
+
+        def flush_range(start_row: int, rows: List[List]):
+            if rows:
+                payload.append({"range": f"{sheet_name}!A{start_row}", "values": rows})
+
+        for start_row, rows in ranges:
+            piece_start = start_row
+            piece = []
+            for row in rows:
+                row_size = len(json.dumps(row, default=str).encode("utf-8")) + 1
+                if payload_size + row_size > self.max_payload_bytes and (payload or piece):
+                    flush_range(piece_start, piece)
+                    payloads.append(payload)
+                    payload = []
+                    payload_size = 0
+                    piece_start += len(piece)
+                    piece = []
+                piece.append(row)
+                payload_size += row_size
+            flush_range(piece_start, piece)
+        if payload:
+            payloads.append(payload)
+        return payloads
+
+    def _execute_with_retry(self, request) -> int:
+        """
+        Execute a request, retrying with exponential backoff and jitter on retryable errors.
+        :param request: Callable executing the API request.
+        :return: Number of attempts made.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                request()
+                return attempt + 1
+            except Exception as e:
+                if attempt == self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = self.backoff_base * (2 ** attempt) * (1 + random.random())
+                logger.warning("Google Sheets request failed (%s), retrying in %.1fs...", e, delay)
+                time.sleep(delay)
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """
+        Check whether a failed request is worth retrying: quota errors, server errors and timeouts.
+        """
+        if isinstance(error, (TimeoutError, ConnectionError)):
+            return True
+        status = getattr(getattr(error, "resp", None), "status", None)
+        return status is not None and int(status) in RETRYABLE_STATUSES
+
     def append(self, sheet_name: str, range_name: str, data: List[List[str]]):
         """
         Append data to the end of a specific range in the Google Sheet.
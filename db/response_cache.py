@@ -0,0 +1,160 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class ResponseCache:
+    def __init__(self, db_path: str = "cache.db", ttl: Optional[Dict[str, int]] = None,
+                 default_ttl: int = 86400, max_size_mb: float = 100):
+        """
+        Persistent cache of Topvisor API responses stored in SQLite.
+        :param db_path: Path to the cache database file.
+        :param ttl: Time to live in seconds per task name.
+        :param default_ttl: Time to live in seconds for tasks missing from ttl.
+        :param max_size_mb: Maximum total size of cached responses, least recently used entries are evicted first.
+        """
+        self.db_path = db_path
+        self.ttl = ttl or {}
+        self.default_ttl = default_ttl
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._initialize_db()
+        # Running total of cached response sizes, so set() does not scan the whole cache
+        self.total_size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM response_cache").fetchone()[0]
+
+    def _initialize_db(self):
+        """Create the cache table if it doesn't exist."""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                cache_key TEXT PRIMARY KEY,
+                task_name TEXT,
+                response TEXT,
+                size INTEGER,
+                created_at REAL,
+                accessed_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_accessed ON response_cache (accessed_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def _normalize(value):
+        """
+        Normalize request parameters so equivalent requests share a cache key.
+        Lists of scalars are sorted, since Topvisor does not depend on their order.
+        """
+        if isinstance(value, dict):
+            return {key: ResponseCache._normalize(value[key]) for key in sorted(value)}
+        if isinstance(value, (list, tuple, set)):
+            items = [ResponseCache._normalize(item) for item in value]
+            if all(isinstance(item, (str, int, float)) for item in items):
+                return sorted(items, key=lambda item: (str(type(item)), item))
+            return items
+        return value
+
+    def make_key(self, task_name: str, params: Dict) -> str:
+        """
+        Build the cache key for a task call.
+        :param task_name: Name of the pytopvisor task.
+        :param params: Task parameters.
+        :return: Hex digest identifying the request.
+        """
+        payload = json.dumps([task_name, self._normalize(params)], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_cacheable(params: Dict) -> bool:
+        """
+        Requests touching today's date are never cached: today's checks may still be running.
+        :param params: Task parameters.
+        :return: True if the response may be cached.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        return today not in json.dumps(params, default=str)
+
+    def get(self, task_name: str, params: Dict) -> Optional[Dict]:
+        """
+        Get a cached response.
+        :param task_name: Name of the pytopvisor task.
+        :param params: Task parameters.
+        :return: Cached response or None if missing, expired or not cacheable.
+        """
+        if not self.is_cacheable(params):
+            with self._lock:
+                self.bypassed += 1
+            return None
+
+        key = self.make_key(task_name, params)
+        ttl = self.ttl.get(task_name, self.default_ttl)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM response_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > ttl:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE response_cache SET accessed_at = ? WHERE cache_key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, task_name: str, params: Dict, response: Dict):
+        """
+        Store a response and evict least recently used entries over the size limit.
+        :param task_name: Name of the pytopvisor task.
+        :param params: Task parameters.
+        :param response: API response to cache.
+        """
+        if not self.is_cacheable(params):
+            return
+
+        key = self.make_key(task_name, params)
+        payload = json.dumps(response)
+        now = time.time()
+        with self._lock, self.conn:
+            replaced = self.conn.execute("SELECT size FROM response_cache WHERE cache_key = ?", (key,)).fetchone()
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO response_cache (cache_key, task_name, response, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, task_name, payload, len(payload), now, now)
+            )
+            self.total_size += len(payload) - (replaced[0] if replaced else 0)
+            self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits into max_size."""
+        if self.total_size <= self.max_size:
+            return
+        # Other processes may share the cache file: recount once before evicting
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM response_cache").fetchone()[0]
+        evict = []
+        for key, size in self.conn.execute("SELECT cache_key, size FROM response_cache ORDER BY accessed_at"):
+            if total <= self.max_size:
+                break
+            evict.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM response_cache WHERE cache_key = ?", evict)
+        self.total_size = total
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get hit and miss counters for the current run.
+        :return: Dictionary with hits, misses and bypassed counts.
+        """
+        return {"hits": self.hits, "misses": self.misses, "bypassed": self.bypassed}
+
+    def close(self):
+        """Close the cache database connection."""
+        if self.conn:
+            self.conn.close()
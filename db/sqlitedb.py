@@ -1,22 +1,161 @@
 import sqlite3
 from pathlib import Path
-from typing import List, Dict, Optional
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Dict, Optional, Sequence, Set, Tuple
 from db.db_interface import DatabaseInterface
 
 
-class SQLiteDB(DatabaseInterface):
-    def __init__(self, db_path: str = "data.db"):
-        self.db_path = db_path
-        self.conn = None
-        self._initialize_db()
+# Performance profile applied to every connection; override keys with the profile argument
+DEFAULT_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,
+    "cache_size": -65536,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+# Rollup tables: rollup table name -> SQLite expression of the period start of project_data.date
+ROLLUPS = {
+    "project_data_weekly": "date(date, 'weekday 0', '-6 days')",
+    "project_data_monthly": "date(date, 'start of month')",
+}
+ROLLUP_COLUMNS = [
+    "period_start",
+    "project_id",
+    "region_index",
+    "days",
+    "first_date",
+    "last_date",
+    "avg_position",
+    "visibility",
+    "all_positions",
+    "top_1_3",
+    "top_1_10",
+    "top_11_30",
+    "top_31_50",
+    "top_51_100",
+    "top_1_3_delta",
+    "top_1_10_delta",
+    "top_11_30_delta",
+    "top_31_50_delta",
+    "top_51_100_delta",
+    "project_name",
+    "search_engine",
+    "region",
+]
+TOP_BUCKETS = ["top_1_3", "top_1_10", "top_11_30", "top_31_50", "top_51_100"]
+
+
+def rollup_create_sql(table_name: str) -> str:
+    """CREATE TABLE statement of a rollup table."""
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            period_start TEXT,
+            project_id INTEGER,
+            region_index INTEGER,
+            days INTEGER,
+            first_date TEXT,
+            last_date TEXT,
+            avg_position REAL,
+            visibility REAL,
+            all_positions INTEGER,
+            {", ".join(f"{bucket} INTEGER" for bucket in TOP_BUCKETS)},
+            {", ".join(f"{bucket}_delta INTEGER" for bucket in TOP_BUCKETS)},
+            project_name TEXT,
+            search_engine TEXT,
+            region TEXT,
+            PRIMARY KEY (period_start, project_id, region_index)
+        )
+    """
+
+
+def rollup_refresh_sql(table_name: str, where: str = "") -> str:
+    """
+    INSERT OR REPLACE statement recomputing rollup periods from project_data:
+    average of avg_position, last visibility and top buckets, and top bucket deltas
+    between the first and the last date of the period.
+    :param table_name: Name of the rollup table.
+    :param where: Optional WHERE clause restricting the project_data rows, with ? placeholders.
+    """
+    period = ROLLUPS[table_name]
+    return f"""
+        INSERT OR REPLACE INTO {table_name} ({", ".join(ROLLUP_COLUMNS)})
+        SELECT
+            agg.period_start, agg.project_id, agg.region_index, agg.days, agg.first_date, agg.last_date,
+            agg.avg_position, l.visibility, l.all_positions,
+            {", ".join(f"l.{bucket}" for bucket in TOP_BUCKETS)},
+            {", ".join(f"l.{bucket} - f.{bucket}" for bucket in TOP_BUCKETS)},
+            l.project_name, l.search_engine, l.region
+        FROM (
+            SELECT {period} AS period_start, project_id, region_index, COUNT(*) AS days,
+                   MIN(date) AS first_date, MAX(date) AS last_date, AVG(avg_position) AS avg_position
+            FROM project_data
+            {where}
+            GROUP BY 1, 2, 3
+        ) agg
+        JOIN project_data f
+            ON f.date = agg.first_date AND f.project_id = agg.project_id AND f.region_index = agg.region_index
+        JOIN project_data l
+            ON l.date = agg.last_date AND l.project_id = agg.project_id AND l.region_index = agg.region_index
+    """
+
+
+def rollup_periods(keys: Iterable[Tuple[int, int, str]]) -> Dict[str, Set[Tuple[int, int, str, str]]]:
+    """
+    Rollup periods touched by project_data rows.
+    :param keys: Iterable of (project_id, region_index, date) tuples.
+    :return: Dictionary of rollup table name to a set of (project_id, region_index, first day, last day) tuples.
+    """
+    periods = {table_name: set() for table_name in ROLLUPS}
+    for project_id, region_index, date in keys:
+        day = datetime.strptime(date, "%Y-%m-%d").date()
+        week_start = day - timedelta(days=day.weekday())
+        month_start = day.replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        periods["project_data_weekly"].add(
+            (project_id, region_index, str(week_start), str(week_start + timedelta(days=6))))
+        periods["project_data_monthly"].add(
+            (project_id, region_index, str(month_start), str(next_month - timedelta(days=1))))
+    return periods
+
+
+# Keyword dates are stored as days since this epoch (date_id)
+DATE_EPOCH = datetime(1970, 1, 1)
+
+
+def date_id(date: str) -> int:
+    """Integer key of a YYYY-MM-DD date in the dates dimension table."""
+    return (datetime.strptime(date, "%Y-%m-%d") - DATE_EPOCH).days
+
+
+CHANGE_OPS = {"insert": "NEW", "update": "NEW", "delete": "OLD"}
 
-    def _initialize_db(self):
-        """Initialize the database and create tables if they don't exist."""
-        self.conn = sqlite3.connect(self.db_path)
-        cursor = self.conn.cursor()
 
+def change_log_trigger_sql(table_name: str, op: str) -> str:
+    """
+    SQL creating the trigger that appends a table's inserts, updates or deletes to change_log.
+    Upserts that leave a row unchanged do not update it, so they are not logged.
+    :param table_name: Table with the (date, project_id, region_index) key.
+    :param op: "insert", "update" or "delete".
+    """
+    row = CHANGE_OPS[op]
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS {table_name}_log_{op} AFTER {op.upper()} ON {table_name}
+        BEGIN
+            INSERT INTO change_log (table_name, date, project_id, region_index, op)
+            VALUES ('{table_name}', {row}.date, {row}.project_id, {row}.region_index, '{op}');
+        END
+    """
+
+
+# Versioned schema migrations, applied in order and tracked with PRAGMA user_version.
+# Version 1 is the schema created before migrations existed, so it uses IF NOT EXISTS
+# to upgrade existing data.db files in place.
+MIGRATIONS = [
+    (1, [
         # Create a table for project data with a composite primary key and new columns
-        cursor.execute("""
+        """
             CREATE TABLE IF NOT EXISTS project_data (
                 date TEXT,
                 project_id INTEGER,
@@ -35,8 +174,137 @@ class SQLiteDB(DatabaseInterface):
                 region TEXT,               
                 PRIMARY KEY (date, project_id, region_index)
             )
-        """)
-        self.conn.commit()
+        """,
+        # Rows already pushed to a Google Sheet: their sheet row number and content hash
+        """
+            CREATE TABLE IF NOT EXISTS sheet_sync (
+                sheet_name TEXT,
+                date TEXT,
+                project_id INTEGER,
+                region_index INTEGER,
+                sheet_row INTEGER,
+                row_hash TEXT,
+                PRIMARY KEY (sheet_name, date, project_id, region_index)
+            )
+        """,
+        # Date chunks already loaded by a backfill
+        """
+            CREATE TABLE IF NOT EXISTS backfill_progress (
+                project_id INTEGER,
+                region_index INTEGER,
+                chunk_start TEXT,
+                chunk_end TEXT,
+                completed_at TEXT,
+                PRIMARY KEY (project_id, region_index, chunk_start, chunk_end)
+            )
+        """,
+    ]),
+    (2, [
+        # Secondary indexes for per-project lookups and date range reports
+        "CREATE INDEX IF NOT EXISTS idx_project_data_project_date ON project_data (project_id, region_index, date)",
+        "CREATE INDEX IF NOT EXISTS idx_project_data_date ON project_data (date)",
+    ]),
+    (3, [
+        # Weekly and monthly rollups, populated from the existing daily rows
+        *[rollup_create_sql(table_name) for table_name in ROLLUPS],
+        *[rollup_refresh_sql(table_name) for table_name in ROLLUPS],
+    ]),
+    (4, [
+        # Append-only log of project_data changes; AUTOINCREMENT keeps seq monotonic after pruning
+        """
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                date TEXT,
+                project_id INTEGER,
+                region_index INTEGER,
+                op TEXT NOT NULL
+            )
+        """,
+        # Position of every consumer (e.g. a Google Sheet) in the change log
+        """
+            CREATE TABLE IF NOT EXISTS change_cursors (
+                consumer TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL
+            )
+        """,
+        *[change_log_trigger_sql("project_data", op) for op in CHANGE_OPS],
+    ]),
+    (5, [
+        # Keyword-level positions: keyword and date dimensions and a narrow integer-only fact table.
+        # Keyword IDs are Topvisor's own; names are stored once per keyword.
+        """
+            CREATE TABLE IF NOT EXISTS keywords (
+                keyword_id INTEGER PRIMARY KEY,
+                project_id INTEGER NOT NULL,
+                name TEXT NOT NULL
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS dates (
+                date_id INTEGER PRIMARY KEY,
+                date TEXT NOT NULL UNIQUE
+            )
+        """,
+        # NULL position: the keyword was checked but not found in the top
+        """
+            CREATE TABLE IF NOT EXISTS keyword_positions (
+                project_id INTEGER NOT NULL,
+                region_index INTEGER NOT NULL,
+                date_id INTEGER NOT NULL,
+                keyword_id INTEGER NOT NULL,
+                position INTEGER,
+                PRIMARY KEY (project_id, region_index, date_id, keyword_id)
+            ) WITHOUT ROWID
+        """,
+    ]),
+]
+
+
+class SQLiteDB(DatabaseInterface):
+    def __init__(self, db_path: str = "data.db", profile: Optional[Dict] = None):
+        """
+        :param db_path: Path to the SQLite database file.
+        :param profile: PRAGMA settings overriding DEFAULT_PROFILE, e.g. {"synchronous": "FULL"}.
+        """
+        self.db_path = db_path
+        self.profile = {**DEFAULT_PROFILE, **(profile or {})}
+        self.conn = None
+        self._initialize_db()
+
+    def _initialize_db(self):
+        """Open the database, apply the performance profile and run pending migrations."""
+        # The connection may be handed to a dedicated writer thread (AsyncProjectManager);
+        # callers make sure only one thread uses it at a time
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._apply_profile()
+        self._migrate()
+
+    def _apply_profile(self):
+        """Apply the PRAGMA settings of the performance profile."""
+        for pragma, value in self.profile.items():
+            if value is not None:
+                self.conn.execute(f"PRAGMA {pragma} = {value}")
+
+    @property
+    def schema_version(self) -> int:
+        """Current schema version of the database."""
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def _migrate(self):
+        """Apply the migrations newer than the database's schema version, each in its own transaction."""
+        for version, statements in MIGRATIONS:
+            if version <= self.schema_version:
+                continue
+            self.conn.execute("BEGIN")
+            try:
+                for statement in statements:
+                    self.conn.execute(statement)
+                self.conn.execute(f"PRAGMA user_version = {int(version)}")
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
 
     def record_exists(self, table_name: str, date: str, project_id: int, region_index: int) -> bool:
         """
@@ -69,6 +337,134 @@ class SQLiteDB(DatabaseInterface):
         cursor.execute(query, list(data.values()))
         self.conn.commit()
 
+    def get_columns(self, table_name: str) -> List[str]:
+        """
+        Get the column names of a table.
+        :param table_name: Name of the table.
+        :return: List of column names, in table order.
+        """
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({table_name})")]
+
+    def get_stored_dates(self, table_name: str, project_id: int, region_index: int,
+                         since: Optional[str] = None) -> Set[str]:
+        """
+        Get the dates already stored for a project and region.
+        :param table_name: Name of the table.
+        :param project_id: ID of the project.
+        :param region_index: Index of the region.
+        :param since: Only consider dates on or after this date (YYYY-MM-DD).
+        :return: Set of dates as strings.
+        """
+        cursor = self.conn.cursor()
+        query = f"SELECT date FROM {table_name} WHERE project_id = ? AND region_index = ?"
+        params = [project_id, region_index]
+        if since:
+            query += " AND date >= ?"
+            params.append(since)
+        cursor.execute(query, params)
+        return {row[0] for row in cursor.fetchall()}
+
+    def bulk_upsert_rows(self, table_name: str, columns: List[str], rows: Sequence[Sequence],
+                         key_columns: Tuple[str, ...] = ("date", "project_id", "region_index")) -> Dict[str, int]:
+        """
+        Insert or update a batch of plain rows in a single transaction.
+        Existing rows are overwritten only when at least one value differs.
+        :param table_name: Name of the table.
+        :param columns: Column names, in the order of the row values.
+        :param rows: Sequence of tuples (or named tuples) of values.
+        :param key_columns: Columns of the table's primary key used as the conflict target.
+        :return: Dictionary with the number of rows inserted, updated and unchanged.
+        """
+        if not rows:
+            return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        value_columns = [column for column in columns if column not in key_columns]
+        query = f"""
+            INSERT INTO {table_name} ({", ".join(columns)})
+            VALUES ({", ".join(["?"] * len(columns))})
+            ON CONFLICT({", ".join(key_columns)}) DO UPDATE SET
+                {", ".join(f"{column} = excluded.{column}" for column in value_columns)}
+            WHERE {" OR ".join(f"{column} IS NOT excluded.{column}" for column in value_columns)}
+        """
+
+        key_positions = [columns.index(column) for column in key_columns]
+        keys = list({tuple(row[position] for position in key_positions) for row in rows})
+        # Keys are looked up through the primary key in batches that fit SQLite's 999 parameter limit
+        batch_size = 999 // len(key_columns)
+        placeholders = f"({', '.join(['?'] * len(key_columns))})"
+        join_condition = " AND ".join(
+            f"t.{column} = batch.column{position}" for position, column in enumerate(key_columns, 1))
+
+        with self.conn:
+            cursor = self.conn.cursor()
+            existing = 0
+            for start in range(0, len(keys), batch_size):
+                batch = keys[start:start + batch_size]
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM (VALUES {', '.join([placeholders] * len(batch))}) AS batch "
+                    f"JOIN {table_name} AS t ON {join_condition}",
+                    [value for key in batch for value in key])
+                existing += cursor.fetchone()[0]
+            cursor.executemany(query, rows)
+            # rowcount excludes the change_log rows written by triggers, unlike total_changes
+            changed = cursor.rowcount
+            inserted = len(keys) - existing
+
+        return {"inserted": inserted, "updated": changed - inserted, "unchanged": len(rows) - changed}
+
+    def merge_from(self, db_path: str, table_name: str = "project_data",
+                   key_columns: Tuple[str, ...] = ("date", "project_id", "region_index")) -> Dict[str, int]:
+        """
+        Upsert all rows of a table from another SQLite file (e.g. a shard) in a single transaction
+        and refresh the rollups they touch.
+        :param db_path: Path to the SQLite file to merge.
+        :param table_name: Name of the table present in both databases.
+        :param key_columns: Columns of the table's primary key used as the conflict target.
+        :return: Dictionary with the number of rows inserted, updated and unchanged.
+        """
+        self.conn.execute("ATTACH DATABASE ? AS shard", (db_path,))
+        try:
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA shard.table_info({table_name})")]
+            value_columns = [column for column in columns if column not in key_columns]
+            total = self.conn.execute(f"SELECT COUNT(*) FROM shard.{table_name}").fetchone()[0]
+            with self.conn:
+                rows_before = self.conn.execute(f"SELECT COUNT(*) FROM main.{table_name}").fetchone()[0]
+                cursor = self.conn.execute(f"""
+                    INSERT INTO main.{table_name} ({", ".join(columns)})
+                    SELECT {", ".join(columns)} FROM shard.{table_name} WHERE true
+                    ON CONFLICT({", ".join(key_columns)}) DO UPDATE SET
+                        {", ".join(f"{column} = excluded.{column}" for column in value_columns)}
+                    WHERE {" OR ".join(f"{column} IS NOT excluded.{column}" for column in value_columns)}
+                """)
+                changed = cursor.rowcount
+                inserted = self.conn.execute(f"SELECT COUNT(*) FROM main.{table_name}").fetchone()[0] - rows_before
+            if table_name == "project_data" and changed:
+                self.update_rollups(
+                    self.conn.execute("SELECT project_id, region_index, date FROM shard.project_data").fetchall())
+        finally:
+            self.conn.execute("DETACH DATABASE shard")
+        return {"inserted": inserted, "updated": changed - inserted, "unchanged": total - changed}
+
+    def update_rollups(self, keys: Iterable[Tuple[int, int, str]]):
+        """
+        Recompute the weekly and monthly rollup periods touched by the given project_data rows.
+        :param keys: Iterable of (project_id, region_index, date) tuples of new or changed rows.
+        """
+        with self.conn:
+            for table_name, table_periods in rollup_periods(keys).items():
+                if table_periods:
+                    self.conn.executemany(
+                        rollup_refresh_sql(table_name, "WHERE project_id = ? AND region_index = ? AND date BETWEEN ? AND ?"),
+                        sorted(table_periods)
+                    )
+
+    def rebuild_rollups(self):
+        """Recompute all rollup tables from project_data."""
+        with self.conn:
+            for table_name in ROLLUPS:
+                self.conn.execute(f"DELETE FROM {table_name}")
+                self.conn.execute(rollup_refresh_sql(table_name))
+
     def read(self, table_name: str, filters: Optional[Dict] = None) -> List[Dict]:
         """
         Retrieve records from the specified table.
@@ -90,6 +486,43 @@ class SQLiteDB(DatabaseInterface):
         columns = [column[0] for column in cursor.description]
         return [dict(zip(columns, row)) for row in rows]
 
+    def iter_rows(self, table_name: str, filters: Optional[Dict] = None, columns: Optional[List[str]] = None,
+                  order_by: Optional[str] = None, chunk_size: int = 5000, after: Optional[str] = None,
+                  before: Optional[str] = None) -> Iterator[List[Tuple]]:
+        """
+        Stream records from the specified table without loading it into memory.
+        :param table_name: Name of the table.
+        :param filters: Dictionary containing filter conditions.
+        :param columns: Columns to select, all columns by default.
+        :param order_by: ORDER BY clause, e.g. "date, project_id".
+        :param chunk_size: Number of rows fetched per chunk.
+        :param after: Only rows with a date later than this one (YYYY-MM-DD).
+        :param before: Only rows with a date earlier than this one (YYYY-MM-DD).
+        :return: Generator of chunks, each a list of row tuples in column order.
+        """
+        cursor = self.conn.cursor()
+        query = f"SELECT {', '.join(columns) if columns else '*'} FROM {table_name}"
+        conditions = [f"{key} = ?" for key in (filters or {})]
+        params = list((filters or {}).values())
+        if after:
+            conditions.append("date > ?")
+            params.append(after)
+        if before:
+            conditions.append("date < ?")
+            params.append(before)
+
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        if order_by:
+            query += f" ORDER BY {order_by}"
+
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
     def update(self, table_name: str, filters: Dict, data: Dict):
         """
         Update records in the specified table using a composite key.
@@ -116,7 +549,267 @@ class SQLiteDB(DatabaseInterface):
         cursor.execute(query, list(filters.values()))
         self.conn.commit()
 
+    def get_change_seq(self) -> int:
+        """
+        Get the sequence number of the latest change_log entry, the cursor of a fully caught up consumer.
+        :return: Sequence number, 0 if nothing has been logged yet.
+        """
+        cursor = self.conn.cursor()
+        # sqlite_sequence keeps the last AUTOINCREMENT value even after the log was pruned
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'change_log'")
+        return cursor.fetchone()[0]
+
+    def iter_changes(self, since: int, until: Optional[int] = None, table_name: str = "project_data",
+                     chunk_size: int = 5000) -> Iterator[List[Tuple[int, str, int, int, str]]]:
+        """
+        Stream the change_log entries of a table after a cursor, in sequence order.
+        :param since: Cursor; entries with a greater sequence number are returned.
+        :param until: Last sequence number to return, e.g. get_change_seq() taken before reading.
+        :param table_name: Name of the logged table.
+        :param chunk_size: Number of entries fetched per chunk.
+        :return: Generator of chunks of (seq, date, project_id, region_index, op) tuples.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            SELECT seq, date, project_id, region_index, op FROM change_log
+            WHERE table_name = ? AND seq > ? AND seq <= ?
+            ORDER BY seq
+            """,
+            (table_name, since, until if until is not None else self.get_change_seq())
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+    def get_cursor(self, consumer: str) -> Optional[int]:
+        """
+        Get the change_log position a consumer has processed up to.
+        :param consumer: Name of the consumer, e.g. "sheet:TopvisorDB".
+        :return: Sequence number, None if the consumer has never saved a cursor.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT seq FROM change_cursors WHERE consumer = ?", (consumer,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def save_cursor(self, consumer: str, seq: int):
+        """
+        Store the change_log position a consumer has processed up to.
+        :param consumer: Name of the consumer.
+        :param seq: Sequence number.
+        """
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO change_cursors (consumer, seq) VALUES (?, ?)", (consumer, seq))
+
+    def prune_change_log(self, consumers: Optional[List[str]] = None) -> int:
+        """
+        Delete the change_log entries every consumer has already processed.
+        :param consumers: Consumers whose cursors count, all registered ones if None; cursors of
+            consumers that are no longer in use then don't hold the log back.
+        :return: Number of deleted entries.
+        """
+        query = "SELECT COALESCE(MIN(seq), 0) FROM change_cursors"
+        params: tuple = ()
+        if consumers is not None:
+            query += f" WHERE consumer IN ({', '.join('?' * len(consumers)) or 'NULL'})"
+            params = tuple(consumers)
+        with self.conn:
+            cursor = self.conn.execute(f"DELETE FROM change_log WHERE seq <= ({query})", params)
+        return cursor.rowcount
+
+    def get_max_sheet_row(self, sheet_name: str) -> int:
+        """
+        Get the last sheet row synced to a Google Sheet.
+        :param sheet_name: Name of the sheet.
+        :return: Sheet row number, 0 if nothing has been synced yet.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(sheet_row), 0) FROM sheet_sync WHERE sheet_name = ?", (sheet_name,))
+        return cursor.fetchone()[0]
+
+    def iter_sync_rows(self, sheet_name: str, table_name: str, columns: List[str],
+                       chunk_size: int = 5000, since: Optional[int] = None,
+                       until: Optional[int] = None) -> Iterator[List[Tuple]]:
+        """
+        Stream table rows together with their sync state for a Google Sheet.
+        The table must have the (date, project_id, region_index) key.
+        :param sheet_name: Name of the sheet.
+        :param table_name: Name of the table.
+        :param columns: Columns to select.
+        :param chunk_size: Number of rows fetched per chunk.
+        :param since: Change log cursor; if given, only rows changed after it are returned,
+                      so the work is proportional to the number of changes instead of the table size.
+        :param until: Last change log sequence number considered together with since.
+        :return: Generator of chunks; every row is the selected values followed by sheet_row and row_hash,
+                 both None for rows never synced.
+        """
+        source = table_name
+        params: List = [sheet_name]
+        if since is not None:
+            source = f"""(
+                SELECT t.* FROM (
+                    SELECT DISTINCT date, project_id, region_index FROM change_log
+                    WHERE table_name = ? AND seq > ? AND seq <= ?
+                ) c
+                JOIN {table_name} t
+                    ON t.date = c.date AND t.project_id = c.project_id AND t.region_index = c.region_index
+            )"""
+            params = [table_name, since, until if until is not None else self.get_change_seq(), sheet_name]
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT {", ".join(f"t.{column}" for column in columns)}, s.sheet_row, s.row_hash
+            FROM {source} t
+            LEFT JOIN sheet_sync s
+                ON s.sheet_name = ? AND s.date = t.date
+                AND s.project_id = t.project_id AND s.region_index = t.region_index
+            """,
+            params
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+    def save_sync_state(self, sheet_name: str, entries: List[Tuple[str, int, int, int, str]]):
+        """
+        Store the sheet position and hash of synced rows in a single transaction.
+        :param sheet_name: Name of the sheet.
+        :param entries: List of (date, project_id, region_index, sheet_row, row_hash) tuples.
+        """
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT OR REPLACE INTO sheet_sync (sheet_name, date, project_id, region_index, sheet_row, row_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [(sheet_name, *entry) for entry in entries]
+            )
+
+    def reset_sync_state(self, sheet_name: str):
+        """
+        Forget everything synced to a Google Sheet, e.g. before a full rebuild.
+        :param sheet_name: Name of the sheet.
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM sheet_sync WHERE sheet_name = ?", (sheet_name,))
+
+    def get_completed_chunks(self, project_id: int, region_index: int) -> Set[Tuple[str, str]]:
+        """
+        Get the backfill chunks already loaded for a project.
+        :param project_id: ID of the project.
+        :param region_index: Index of the region.
+        :return: Set of (chunk_start, chunk_end) tuples.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT chunk_start, chunk_end FROM backfill_progress WHERE project_id = ? AND region_index = ?",
+            (project_id, region_index)
+        )
+        return {(row[0], row[1]) for row in cursor.fetchall()}
+
+    def mark_chunk_completed(self, project_id: int, region_index: int, chunk_start: str, chunk_end: str):
+        """
+        Checkpoint a loaded backfill chunk.
+        :param project_id: ID of the project.
+        :param region_index: Index of the region.
+        :param chunk_start: First date of the chunk.
+        :param chunk_end: Last date of the chunk.
+        """
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO backfill_progress (project_id, region_index, chunk_start, chunk_end, completed_at)
+                VALUES (?, ?, ?, ?, datetime('now'))
+                """,
+                (project_id, region_index, chunk_start, chunk_end)
+            )
+
+    def save_keyword_positions(self, project_id: int, region_index: int,
+                               rows: Sequence[Tuple[int, str, str, Optional[int]]]) -> int:
+        """
+        Bulk insert a page of keyword positions, with its keywords and dates, in a single transaction.
+        Positions already stored are overwritten only when they differ.
+        :param project_id: ID of the project.
+        :param region_index: Index of the region.
+        :param rows: Sequence of (keyword_id, keyword name, date, position) tuples.
+        :return: Number of positions inserted or updated.
+        """
+        if not rows:
+            return 0
+
+        keywords = {keyword_id: name for keyword_id, name, date, position in rows}
+        dates = {date for keyword_id, name, date, position in rows}
+        with self.conn:
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO keywords (keyword_id, project_id, name) VALUES (?, ?, ?)
+                ON CONFLICT(keyword_id) DO UPDATE SET name = excluded.name WHERE name IS NOT excluded.name
+                """,
+                [(keyword_id, project_id, name) for keyword_id, name in keywords.items()]
+            )
+            cursor.executemany("INSERT OR IGNORE INTO dates (date_id, date) VALUES (?, ?)",
+                               [(date_id(date), date) for date in dates])
+            cursor.executemany(
+                """
+                INSERT INTO keyword_positions (project_id, region_index, date_id, keyword_id, position)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(project_id, region_index, date_id, keyword_id) DO UPDATE SET
+                    position = excluded.position
+                WHERE position IS NOT excluded.position
+                """,
+                [(project_id, region_index, date_id(date), keyword_id, position)
+                 for keyword_id, name, date, position in rows]
+            )
+            return cursor.rowcount
+
+    def get_top_movers(self, project_id: int, region_index: int, date_from: str, date_to: str,
+                       limit: int = 10, direction: str = "both",
+                       missing_position: int = 101) -> List[Tuple[int, str, Optional[int], Optional[int], int]]:
+        """
+        Get the keywords whose positions changed the most between two dates, computed in SQLite.
+        :param project_id: ID of the project.
+        :param region_index: Index of the region.
+        :param date_from: Earlier date (YYYY-MM-DD).
+        :param date_to: Later date (YYYY-MM-DD).
+        :param limit: Number of keywords to return.
+        :param direction: "up" for the biggest gains, "down" for the biggest losses, "both" for either.
+        :param missing_position: Position assumed for keywords not found in the top.
+        :return: List of (keyword_id, name, position_from, position_to, change) tuples;
+                 a positive change means the keyword moved up.
+        """
+        order = {"up": "change DESC", "down": "change ASC", "both": "ABS(change) DESC"}[direction]
+        where = {"up": "AND change > 0", "down": "AND change < 0", "both": "AND change != 0"}[direction]
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT keyword_id, name, position_from, position_to, change FROM (
+                SELECT k.keyword_id, k.name, a.position AS position_from, b.position AS position_to,
+                       COALESCE(a.position, :missing) - COALESCE(b.position, :missing) AS change
+                FROM keyword_positions a
+                JOIN keyword_positions b
+                    ON b.project_id = a.project_id AND b.region_index = a.region_index
+                    AND b.date_id = :date_to AND b.keyword_id = a.keyword_id
+                JOIN keywords k ON k.keyword_id = a.keyword_id
+                WHERE a.project_id = :project_id AND a.region_index = :region_index AND a.date_id = :date_from
+            )
+            WHERE true {where}
+            ORDER BY {order}, keyword_id
+            LIMIT :limit
+            """,
+            {"project_id": project_id, "region_index": region_index, "date_from": date_id(date_from),
+             "date_to": date_id(date_to), "missing": missing_position, "limit": limit}
+        )
+        return cursor.fetchall()
+
     def close(self):
         """Close the database connection."""
         if self.conn:
+            self.conn.execute("PRAGMA optimize")
             self.conn.close()
\ No newline at end of file
@@ -0,0 +1,121 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status: int):
+        """
+        Error shaped like googleapiclient and requests HTTP errors: the status is available
+        as resp.status and status_code.
+        :param status: HTTP status code.
+        """
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        self.resp = type("Response", (), {"status": status})()
+
+
+class _Request:
+    def __init__(self, service: "FakeSheetsService", action, kind: str, body: Optional[Dict] = None):
+        self.service = service
+        self.action = action
+        self.kind = kind
+        self.body = body
+
+    def execute(self):
+        self.service.requests.append((self.kind, self.body))
+        if self.service.failures:
+            status = self.service.failures.pop(0)
+            if status:
+                raise FakeHttpError(status)
+        return self.action()
+
+
+class _Values:
+    def __init__(self, service: "FakeSheetsService"):
+        self.service = service
+
+    def get(self, spreadsheetId: str, range: str):
+        return _Request(self.service, lambda: {"values": self.service.get_values(range)}, "get")
+
+    def update(self, spreadsheetId: str, range: str, valueInputOption: str, body: Dict):
+        return _Request(self.service, lambda: self.service.set_values(range, body["values"]), "update", body)
+
+    def batchUpdate(self, spreadsheetId: str, body: Dict):
+        def action():
+            for value_range in body["data"]:
+                self.service.set_values(value_range["range"], value_range["values"])
+            return {"totalUpdatedRows": sum(len(value_range["values"]) for value_range in body["data"])}
+        return _Request(self.service, action, "batchUpdate", body)
+
+    def append(self, spreadsheetId: str, range: str, valueInputOption: str, insertDataOption: str, body: Dict):
+        def action():
+            sheet_name, _, _ = self.service.parse_range(range)
+            next_row = self.service.last_row(sheet_name) + 1
+            return self.service.set_values(f"{sheet_name}!A{next_row}", body["values"])
+        return _Request(self.service, action, "append", body)
+
+    def clear(self, spreadsheetId: str, range: str):
+        return _Request(self.service, lambda: self.service.clear_values(range), "clear")
+
+
+class _Spreadsheets:
+    def __init__(self, service: "FakeSheetsService"):
+        self.service = service
+
+    def values(self):
+        return _Values(self.service)
+
+
+class FakeSheetsService:
+    def __init__(self, failures: Optional[List[int]] = None):
+        """
+        In-memory stand-in for the Google Sheets API service, for offline runs and benchmarks.
+        Supports spreadsheets().values() get, update, batchUpdate, append and clear.
+        :param failures: HTTP statuses raised by the next requests, in order; 0 lets a request through.
+        """
+        self.sheets: Dict[str, Dict[Tuple[int, int], object]] = {}
+        self.failures = list(failures or [])
+        self.requests: List[Tuple[str, Optional[Dict]]] = []
+
+    def spreadsheets(self):
+        return _Spreadsheets(self)
+
+    @staticmethod
+    def parse_range(full_range: str) -> Tuple[str, int, int]:
+        """
+        Parse "Sheet!B5" or "Sheet!B5:N10" into the sheet name and the 1-based top-left row and column.
+        """
+        sheet_name, _, cells = full_range.partition("!")
+        match = re.match(r"([A-Z]+)(\d*)", cells)
+        column = 0
+        for char in match.group(1):
+            column = column * 26 + ord(char) - ord("A") + 1
+        return sheet_name, int(match.group(2) or 1), column
+
+    def set_values(self, full_range: str, values: List[List]) -> Dict:
+        sheet_name, row, column = self.parse_range(full_range)
+        cells = self.sheets.setdefault(sheet_name, {})
+        for i, values_row in enumerate(values):
+            for j, value in enumerate(values_row):
+                cells[(row + i, column + j)] = value
+        return {"updatedRows": len(values)}
+
+    def get_values(self, full_range: str) -> List[List]:
+        sheet_name, row, column = self.parse_range(full_range)
+        cells = self.sheets.get(sheet_name, {})
+        rows = []
+        for current_row in range(row, self.last_row(sheet_name) + 1):
+            columns = [c for (r, c) in cells if r == current_row and c >= column]
+            width = max(columns) - column + 1 if columns else 0
+            rows.append([cells.get((current_row, column + j), "") for j in range(width)])
+        return rows
+
+    def clear_values(self, full_range: str) -> Dict:
+        sheet_name, row, column = self.parse_range(full_range)
+        cells = self.sheets.get(sheet_name, {})
+        for key in [key for key in cells if key[0] >= row and key[1] >= column]:
+            del cells[key]
+        return {}
+
+    def last_row(self, sheet_name: str) -> int:
+        return max((r for r, c in self.sheets.get(sheet_name, {})), default=0)
@@ -0,0 +1,116 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable
+
+from fakes.sheets_service import FakeHttpError
+
+
+class FakeTopvisor:
+    def __init__(self, latency: float = 0.0, padding_bytes: int = 0, failing_projects: Iterable[int] = (),
+                 seed: int = 0, error_statuses: Iterable[int] = (), keywords: int = 0,
+                 api_errors: Iterable[int] = ()):
+        """
+        Local stand-in for the pytopvisor client, answering get_history and get_summary_chart.
+        Every date has a position check, so get_history returns each day of the requested range.
+        :param latency: Seconds slept per request to simulate network latency.
+        :param padding_bytes: Size of a filler field added to every response to simulate larger payloads.
+        :param failing_projects: Project IDs whose requests raise an error.
+        :param seed: Seed of the generated position numbers.
+        :param error_statuses: HTTP statuses raised by the next requests, in order; 0 lets a request through.
+        :param keywords: Number of keywords per project served by the keyword positions endpoint.
+        :param api_errors: Topvisor error codes returned in the JSON body of the next requests, in order;
+            raised as the pytopvisor exception of the code (e.g. 429 as RateLimitError), 0 lets a request through.
+        """
+        self.latency = latency
+        self.padding = "x" * padding_bytes
+        self.failing_projects = set(failing_projects)
+        self.seed = seed
+        self.error_statuses = list(error_statuses)
+        self.keywords = keywords
+        self.api_errors = list(api_errors)
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Raw endpoint requests go through api_client.send_request like in pytopvisor
+        self.api_client = self
+
+    def run_task(self, task_name: str, **params) -> Dict:
+        if task_name == "get_summary_chart" and "projects_ids" in params:
+            # Like pytopvisor, whose get_summary_chart takes a single project_id
+            raise TypeError("get_summary_chart() got an unexpected keyword argument 'projects_ids'")
+        return self._answer(task_name, params)
+
+    def _answer(self, task_name: str, params: Dict) -> Dict:
+        with self._lock:
+            self.calls[task_name] = self.calls.get(task_name, 0) + 1
+            status = self.error_statuses.pop(0) if self.error_statuses else 0
+            code = self.api_errors.pop(0) if self.api_errors else 0
+        if self.latency:
+            time.sleep(self.latency)
+        if status:
+            raise FakeHttpError(status)
+        if code:
+            from pytopvisor.utils.exceptions import ERROR_MAPPING, TopvisorAPIError
+
+            raise ERROR_MAPPING.get(code, TopvisorAPIError)(f"[{code}] Fake Topvisor error. ")
+
+        projects_ids = params.get("projects_ids") or [params.get("project_id")]
+        failing = self.failing_projects.intersection(projects_ids)
+        if failing:
+            raise RuntimeError(f"Fake Topvisor error for projects {sorted(failing)}")
+
+        if task_name == "keyword_positions":
+            return {"result": {"padding": self.padding}}
+        if task_name == "get_history":
+            return self._history(params["date1"], params["date2"])
+        if task_name == "get_summary_chart":
+            return self._summary_chart(projects_ids, params["dates"])
+        raise ValueError(f"Unsupported task: {task_name}")
+
+    def send_request(self, endpoint: str, payload: Dict) -> Dict:
+        """
+        Answer a raw positions_2/summary/chart request like get_summary_chart, or a raw
+        positions_2/history request with keyword positions, paged by limit and offset.
+        """
+        if endpoint.endswith("/summary/chart"):
+            return self._answer("get_summary_chart", payload)
+        response = self._answer("keyword_positions", payload)
+        start = datetime.strptime(payload["date1"], "%Y-%m-%d")
+        days = (datetime.strptime(payload["date2"], "%Y-%m-%d") - start).days + 1
+        dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(max(0, days))]
+        offset, limit = payload.get("offset", 0), payload.get("limit", 10000)
+        project_id, region_index = payload["project_id"], payload["regions_indexes"][0]
+
+        keywords = []
+        for index in range(offset, min(offset + limit, self.keywords)):
+            keyword_id = project_id * 1_000_000 + index
+            positions = {}
+            for date in dates:
+                rng = random.Random(f"{self.seed}-{keyword_id}-{date}")
+                position = rng.randint(1, 120)
+                positions[f"{date}:{project_id}:{region_index}"] = {"position": position if position <= 100 else "--"}
+            keywords.append({"id": keyword_id, "name": f"keyword {keyword_id}", "positionsData": positions})
+        response["result"]["keywords"] = keywords
+        if offset + limit < self.keywords:
+            response["nextOffset"] = offset + limit
+        return response
+
+    def _history(self, date1: str, date2: str) -> Dict:
+        start = datetime.strptime(date1, "%Y-%m-%d")
+        days = (datetime.strptime(date2, "%Y-%m-%d") - start).days + 1
+        dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(max(0, days))]
+        return {"result": {"existsDates": dates, "padding": self.padding}}
+
+    def _summary_chart(self, projects_ids: list, dates: list) -> Dict:
+        dates = sorted(dates)
+        series = {}
+        for project_id in projects_ids:
+            rng = random.Random(f"{self.seed}-{project_id}-{dates[0] if dates else ''}")
+            tops = {key: [rng.randint(0, 500) for _ in dates] for key in ("all", "1_3", "1_10", "11_30", "31_50", "51_100")}
+            series[str(project_id)] = {
+                "tops": tops,
+                "avg": [round(rng.uniform(1, 100), 2) for _ in dates],
+                "visibility": [round(rng.random(), 4) for _ in dates],
+            }
+        return {"result": {"dates": dates, "seriesByProjectsId": series, "padding": self.padding}}
@@ -1,18 +1,117 @@
+import hashlib
+import json
+import queue
+import threading
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from pathlib import Path
 from config.settings import Config
-from typing import List, Dict
-from config.logger import logger
-from db.sqlitedb import SQLiteDB
-from db.googlesheetwriter import GoogleSheetsManager
+from typing import Iterator, List, Dict, NamedTuple, Optional, TYPE_CHECKING
+from config.logger import brief, logger
+from config.metrics import RunMetrics, instrumented
+from db.db_interface import DatabaseInterface
+from db.sqlitedb import SQLiteDB, ROLLUP_COLUMNS
+from db.response_cache import ResponseCache
+from api.scheduler import RequestScheduler
+from db.exporter_interface import ExporterInterface
+
+if TYPE_CHECKING:
+    # Imported on first use in _initialize_google_sheets: runs that never touch Sheets skip loading googleapiclient
+    from db.googlesheetwriter import GoogleSheetsManager
+
+
+class SummaryRow(NamedTuple):
+    """One project_data row, in table and sheet column order."""
+    date: str
+    project_id: int
+    region_index: int
+    all_positions: int
+    top_1_3: int
+    top_1_10: int
+    top_11_30: int
+    top_31_50: int
+    top_51_100: int
+    avg_position: float
+    visibility: float
+    project_name: str
+    search_engine: str
+    region: str
+
+
+class SheetSyncPlan(NamedTuple):
+    """Incremental sheet sync worked out from SQLite, before it is uploaded."""
+    until: int              # last change log sequence number covered
+    blocks: List[tuple]     # (sheet_row, rows) ranges of changed rows to rewrite
+    appended: List[List]    # new rows to append below the last synced row
+    append_row: int         # sheet row of the first appended row
+    synced: List[tuple]     # (date, project_id, region_index, sheet_row, row_hash) to store afterwards
+
+
+SHEET_NAME = "TopvisorDB"
+SHEET_COLUMNS = list(SummaryRow._fields)
+# Topvisor endpoint with keyword-level positions; called directly because pytopvisor's
+# get_history does not pass the limit/offset paging parameters
+KEYWORD_HISTORY_ENDPOINT = "/v2/json/get/positions_2/history"
+# Summary chart endpoint; batched requests are sent directly because pytopvisor's
+# get_summary_chart accepts a single project_id and rejects projects_ids
+SUMMARY_CHART_ENDPOINT = "/v2/json/get/positions_2/summary/chart"
+# Change log consumer name of the sheet export
+SHEET_CURSOR = f"sheet:{SHEET_NAME}"
+SHEET_HEADER = [
+    "Date",
+    "Project ID",
+    "Region Index",
+    "All Keywords",
+    "Top 1-3",
+    "Top 1-10",
+    "Top 11-30",
+    "Top 31-50",
+    "Top 51-100",
+    "Avg Position",
+    "Visibility",
+    "Project Name",  # New header
+    "Search Engine",  # New header
+    "Region"  # New header
+]
+
 
 class ProjectManager:
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, topvisor=None, db: Optional[DatabaseInterface] = None,
+                 google_sheets: Optional["GoogleSheetsManager"] = None, index_db: Optional[DatabaseInterface] = None,
+                 exporters: Optional[List[ExporterInterface]] = None):
+        """
+        :param config: Application configuration.
+        :param topvisor: Topvisor client to use instead of creating one from the configuration.
+        :param db: Database to use instead of the one selected in the database section of settings.
+        :param google_sheets: Google Sheets manager to use instead of creating one from the configuration.
+            By default it is created on first use, so runs that never touch Sheets don't need credentials.
+        :param index_db: Database consulted for already stored dates, defaults to db.
+        :param exporters: Local exporters run after the Google Sheets sync, defaults to the enabled
+            ones in the exporters section of settings.
+        """
         logger.debug("Initializing ProjectManager...")
         self.config: Config = config
-        self.topvisor = self._initialize_topvisor()
-        self.db = SQLiteDB()
-        self.google_sheets = self._initialize_google_sheets()
+        concurrency = self.config.get("concurrency") or {}
+        self.workers = int(concurrency.get("workers", 1))
+        self.max_per_host = int(concurrency.get("max_per_host", self.workers))
+        self._topvisor_slots = threading.BoundedSemaphore(max(1, self.max_per_host))
+        self.export_chunk_size = int((self.config.get("export") or {}).get("chunk_size", 5000))
+        rollup_settings = self.config.get("rollups") or {}
+        self.rollup_sheets: Dict[str, str] = rollup_settings.get("sheets", {}) if rollup_settings.get("export") else {}
+        self.summary_batch_size = int((self.config.get("batching") or {}).get("summary_batch_size", 1))
+        self.failures: List[Dict] = []
+        self.metrics = RunMetrics()
+        self.topvisor = topvisor or self._initialize_topvisor()
+        self.db = db or self._initialize_db()
+        self.index_db = index_db or self.db
+        self.cache = self._initialize_cache()
+        self.scheduler = self._initialize_scheduler()
+        self._google_sheets = google_sheets
+        self.exporters = exporters if exporters is not None else self._initialize_exporters()
         logger.info("ProjectManager initialized successfully.")
 
     def _initialize_topvisor(self):
@@ -20,7 +119,7 @@ class ProjectManager:
         Initialize the Topvisor client using the configuration.
         :return: Topvisor API client instance.
         """
-        from pytopvisor.topvisor import Topvisor
+        from api.topvisor import create_topvisor
         logger.debug("Initializing Topvisor...")
 
         user_id = self.config.get("user_id")
@@ -29,41 +128,163 @@ class ProjectManager:
         if not user_id or not api_key:
             raise ValueError("Missing 'user_id' or 'api_key' in configuration.")
 
+        http_settings = self.config.get("http") or {}
         logger.info("Topvisor initialized successfully.")
-        return Topvisor(user_id=user_id, api_key=api_key)
+        return create_topvisor(
+            user_id=user_id,
+            api_key=api_key,
+            pool_size=int(http_settings.get("pool_size", self.max_per_host)),
+            connect_timeout=float(http_settings.get("connect_timeout", 5)),
+            read_timeout=float(http_settings.get("read_timeout", 60))
+        )
+
+    @property
+    def google_sheets(self) -> "GoogleSheetsManager":
+        """Google Sheets manager, initialized on first use."""
+        if self._google_sheets is None:
+            self._google_sheets = self._initialize_google_sheets()
+        return self._google_sheets
+
+    @google_sheets.setter
+    def google_sheets(self, value: "GoogleSheetsManager"):
+        self._google_sheets = value
 
     def _initialize_google_sheets(self):
         """
         Initialize the Google Sheets Manager.
         :return: GoogleSheetsManager instance.
         """
+        from db.googlesheetwriter import GoogleSheetsManager
+
         service_file_name = self.config.get("service_file")
         spreadsheet_id = self.config.get("google_sheets")
 
         if not service_file_name or not spreadsheet_id:
             raise ValueError("Missing 'service_file' or 'google_sheets' in configuration.")
 
+        export_settings = self.config.get("export") or {}
+        http_settings = self.config.get("http") or {}
         return GoogleSheetsManager(
             credentials_path=f"config/{service_file_name}",
-            spreadsheet_id=spreadsheet_id
+            spreadsheet_id=spreadsheet_id,
+            max_payload_bytes=int(export_settings.get("max_payload_bytes", 2_000_000)),
+            max_retries=int(export_settings.get("max_retries", 5)),
+            timeout=float(http_settings.get("sheets_timeout", 120))
         )
 
+    def _initialize_exporters(self) -> List[ExporterInterface]:
+        """
+        Create the local exporters enabled in the exporters section of settings.
+        :return: List of exporters.
+        """
+        exporters = []
+        columnar = (self.config.get("exporters") or {}).get("columnar") or {}
+        if columnar.get("enabled"):
+            from db.columnar_exporter import ColumnarExporter
+            exporters.append(ColumnarExporter(
+                path=str(Path(self.config.get("base_dir") or ".") / columnar.get("path", "export")),
+                file_format=columnar.get("format", "parquet"),
+                compression=columnar.get("compression"),
+                chunk_size=int(columnar.get("chunk_size", 50000))
+            ))
+        return exporters
 
-    def get_dates_from_history(self, project_id: int, region_index: int, days_back: int = 3) -> List[str]:
+    def _initialize_db(self) -> DatabaseInterface:
         """
-        Get dates from the history of position checks.
+        Open the database backend selected by database.backend: SQLite with the performance profile
+        from the sqlite section, or PostgreSQL with the pool settings from the postgres section.
+        :return: Database instance.
+        """
+        backend = (self.config.get("database") or {}).get("backend", "sqlite")
+        if backend == "postgres":
+            from db.postgresdb import PostgresDB
+
+            postgres_settings = dict(self.config.get("postgres") or {})
+            dsn = postgres_settings.pop("dsn", None)
+            # POSTGRES_DSN from .env keeps the password out of settings.yaml
+            dsn = self.config.get("postgres_dsn") or dsn
+            if not dsn:
+                raise ValueError("The postgres backend needs POSTGRES_DSN in .env or postgres.dsn in settings.yaml.")
+            return PostgresDB(dsn, **postgres_settings)
+        if backend != "sqlite":
+            raise ValueError(f"Unsupported database backend '{backend}', expected 'sqlite' or 'postgres'.")
+
+        sqlite_settings = dict(self.config.get("sqlite") or {})
+        db_path = sqlite_settings.pop("path", "data.db")
+        return SQLiteDB(db_path, profile=sqlite_settings)
+
+    def _initialize_cache(self) -> Optional[ResponseCache]:
+        """
+        Initialize the Topvisor response cache if it is enabled in the configuration.
+        :return: ResponseCache instance or None.
+        """
+        cache_settings = self.config.get("cache") or {}
+        if not cache_settings.get("enabled", False):
+            return None
+
+        logger.debug("Initializing response cache...")
+        return ResponseCache(
+            db_path=cache_settings.get("path", "cache.db"),
+            ttl=cache_settings.get("ttl"),
+            default_ttl=cache_settings.get("default_ttl", 86400),
+            max_size_mb=cache_settings.get("max_size_mb", 100)
+        )
+
+    def _initialize_scheduler(self) -> RequestScheduler:
+        """
+        Initialize the Topvisor request scheduler from the configuration.
+        :return: RequestScheduler instance.
+        """
+        settings = self.config.get("rate_limit") or {}
+        return RequestScheduler(
+            requests_per_second=float(settings.get("requests_per_second", 5)),
+            burst=int(settings.get("burst", 10)),
+            max_retries=int(settings.get("max_retries", 5)),
+            backoff_base=float(settings.get("backoff_base", 1.0)),
+            backoff_max=float(settings.get("backoff_max", 60)),
+            breaker_threshold=int(settings.get("breaker_threshold", 5)),
+            breaker_cooldown=float(settings.get("breaker_cooldown", 60)),
+            run_deadline=settings.get("run_deadline")
+        )
+
+    def _run_task(self, task_name: str, **params) -> Dict:
+        """
+        Run a Topvisor task through the request scheduler (rate limit, retries, circuit breaker),
+        holding one of the per-host connection slots for every attempt.
+        All Topvisor endpoints live on the same host, so a single semaphore caps them.
+        Responses are served from the cache when it is enabled.
+        :param task_name: Name of the pytopvisor task.
+        :return: Raw API response.
+        """
+        if self.cache:
+            cached = self.cache.get(task_name, params)
+            if cached is not None:
+                return cached
+
+        def attempt():
+            with self._topvisor_slots:
+                return self.topvisor.run_task(task_name, **params)
+
+        response = self.scheduler.execute(task_name, attempt)
+        self.metrics.add(bytes_in=len(json.dumps(response, default=str)))
+
+        if self.cache:
+            self.cache.set(task_name, params, response)
+        return response
+
+    def get_exists_dates(self, project_id: int, region_index: int, start_date: str, end_date: str) -> List[str]:
+        """
+        Get all dates with position checks in a date range, newest first.
         :param project_id: ID of the project.
         :param region_index: Index of the region.
-        :param days_back: Number of days to look back.
+        :param start_date: First date of the range (YYYY-MM-DD).
+        :param end_date: Last date of the range (YYYY-MM-DD).
         :return: List of dates as strings.
         """
-        logger.debug(f"Fetching dates from history for project_id={project_id}, region_index={region_index}, days_back={days_back}")
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        start_date = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
-        logger.debug(f"Start date: {start_date}, End date: {end_date}")
+        logger.debug("Start date: %s, End date: %s", start_date, end_date)
 
         try:
-            history = self.topvisor.run_task(
+            history = self._run_task(
                 "get_history",
                 project_id=project_id,
                 regions_indexes=[region_index],
@@ -71,32 +292,50 @@ class ProjectManager:
                 date2=end_date,
                 show_exists_dates=True
             )
-            logger.debug(f"Get History response: {history}")
+            logger.debug("Get History response: %s", brief(history))
 
             # Extract all dates from the response
             all_dates = history["result"]["existsDates"]
 
-            # Filter the last 3 dates (or any other number)
-            last_10_dates = sorted(
+            return sorted(
                 all_dates,
                 key=lambda x: datetime.strptime(x, "%Y-%m-%d"),
                 reverse=True
-            )[:10]
-            logger.info(f"Last 3 dates fetched: {last_10_dates}")
-
-            return last_10_dates
+            )
 
         except KeyError as e:
-            logger.error(f"KeyError in get_dates_from_history: {e}")
+            logger.error("KeyError in get_dates_from_history: %s", e)
             raise ValueError(f"Unexpected API response format. Missing key: {e}")
         except Exception as e:
-            logger.error(f"Error fetching dates from history: {e}")
+            logger.error("Error fetching dates from history: %s", e)
             raise
 
-    def get_summary_data(self, project_id: int, region_index: int, dates: List[str], project_info: Dict) -> List[Dict]:
-        logger.debug(f"Fetching summary data for project_id={project_id}, region_index={region_index}, dates={dates}")
+    @instrumented("get_dates_from_history")
+    def get_dates_from_history(self, project_id: int, region_index: int, days_back: int = 3) -> List[str]:
+        """
+        Get dates from the history of position checks.
+        :param project_id: ID of the project.
+        :param region_index: Index of the region.
+        :param days_back: Number of days to look back.
+        :return: List of dates as strings.
+        """
+        logger.debug("Fetching dates from history for project_id=%s, region_index=%s, days_back=%s",
+                     project_id, region_index, days_back)
+        end_date = datetime.now().strftime("%Y-%m-%d")
+        start_date = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
+
+        # Keep the 10 most recent dates
+        last_10_dates = self.get_exists_dates(project_id, region_index, start_date, end_date)[:10]
+        logger.info("Last 3 dates fetched: %s", last_10_dates)
+
+        return last_10_dates
+
+    @instrumented("get_summary_data")
+    def get_summary_data(self, project_id: int, region_index: int, dates: List[str],
+                         project_info: Dict) -> List[SummaryRow]:
+        logger.debug("Fetching summary data for project_id=%s, region_index=%s, dates=%s", project_id, region_index, dates)
         try:
-            summary_chart = self.topvisor.run_task(
+            summary_chart = self._run_task(
                 "get_summary_chart",
                 project_id=project_id,
                 region_index=region_index,
@@ -105,63 +344,171 @@ class ProjectManager:
                 show_avg=True,
                 show_visibility=True
             )
-            logger.debug(f"Summary chart response: {summary_chart}")
-            result = []
-            for i, date in enumerate(summary_chart["result"]["dates"]):
-                data = {
-                    "date": date,
-                    "project_id": project_id,
-                    "region_index": region_index,
-                    "all_positions": summary_chart["result"]["seriesByProjectsId"][str(project_id)]["tops"]["all"][i],
-                    "top_1_3": summary_chart["result"]["seriesByProjectsId"][str(project_id)]["tops"]["1_3"][i],
-                    "top_1_10": summary_chart["result"]["seriesByProjectsId"][str(project_id)]["tops"]["1_10"][i],
-                    "top_11_30": summary_chart["result"]["seriesByProjectsId"][str(project_id)]["tops"]["11_30"][i],
-                    "top_31_50": summary_chart["result"]["seriesByProjectsId"][str(project_id)]["tops"]["31_50"][i],
-                    "top_51_100": summary_chart["result"]["seriesByProjectsId"][str(project_id)]["tops"]["51_100"][i],
-                    "avg_position": summary_chart["result"]["seriesByProjectsId"][str(project_id)]["avg"][i],
-                    "visibility": summary_chart["result"]["seriesByProjectsId"][str(project_id)]["visibility"][i],
-                    "project_name": project_info["project_name"],  # New field
-                    "search_engine": project_info["search_engine"],  # New field
-                    "region": project_info["region"]  # New field
-                }
-                result.append(data)
-            logger.info(f"Summary data processed for {len(result)} dates.")
-            return result
+            logger.debug("Summary chart response: %s", brief(summary_chart))
+            return self._parse_summary_chart(summary_chart, project_id, region_index, project_info)
         except KeyError as e:
-            logger.error(f"KeyError in get_summary_data: {e}")
+            logger.error("KeyError in get_summary_data: %s", e)
             raise ValueError(f"Unexpected API response format. Missing key: {e}")
         except Exception as e:
-            logger.error(f"Error fetching summary data: {e}")
+            logger.error("Error fetching summary data: %s", e)
             raise
 
-    def process_project(self, project_id: int, region_index: int, project_info: Dict, days_back: int = 3) -> List[Dict]:
+    def _parse_summary_chart(self, summary_chart: Dict, project_id: int, region_index: int,
+                             project_info: Dict) -> List[SummaryRow]:
         """
-        Process a single project and return the formatted data.
+        Extract the rows of a single project from a summary chart response.
+        Every series is looked up once and zipped with the dates.
+        :param summary_chart: Response of get_summary_chart, possibly covering several projects.
+        :param project_id: ID of the project.
+        :param region_index: Index of the region.
+        :param project_info: Dictionary with project_name, search_engine and region.
+        :return: List of rows, one per date.
+        """
+        result = summary_chart["result"]
+        series = result["seriesByProjectsId"][str(project_id)]
+        tops = series["tops"]
+        project_name = project_info["project_name"]
+        search_engine = project_info["search_engine"]
+        region = project_info["region"]
+        rows = [
+            SummaryRow(date, project_id, region_index, *values, project_name, search_engine, region)
+            for date, *values in zip(
+                result["dates"],
+                tops["all"],
+                tops["1_3"],
+                tops["1_10"],
+                tops["11_30"],
+                tops["31_50"],
+                tops["51_100"],
+                series["avg"],
+                series["visibility"],
+                strict=True
+            )
+        ]
+        self.metrics.add(rows=len(rows), project_id=project_id)
+        logger.info("Summary data processed for %d dates.", len(rows))
+        return rows
+
+    @instrumented("get_summary_batch")
+    def get_summary_batch(self, region_index: int, dates: List[str], projects: List[Dict]) -> List:
+        """
+        Fetch summary data for several projects sharing a region and dates with one request.
+        Falls back to one request per project if the batched request fails.
+        :param region_index: Index of the region.
+        :param dates: Dates shared by all projects of the batch.
+        :param projects: List of dictionaries with project_id and project_info.
+        :return: List with either the rows or the raised exception for each project, in input order.
+        """
+        if len(projects) > 1:
+            projects_ids = sorted({project["project_id"] for project in projects})
+            logger.debug("Fetching summary data for projects_ids=%s, region_index=%s, dates=%s", projects_ids, region_index, dates)
+            try:
+                summary_chart = self._send_request(SUMMARY_CHART_ENDPOINT, {
+                    "project_id": projects_ids[0],
+                    "projects_ids": projects_ids,
+                    "region_index": region_index,
+                    "dates": dates,
+                    "show_tops": 1,
+                    "show_avg": 1,
+                    "show_visibility": 1,
+                })
+                logger.debug("Summary chart response: %s", brief(summary_chart))
+                return [
+                    self._parse_summary_chart(summary_chart, project["project_id"], region_index, project["project_info"])
+                    for project in projects
+                ]
+            except Exception as e:
+                logger.warning(
+                    "Batched summary request for projects_ids=%s failed, falling back to per-project requests: %s",
+                    projects_ids, e)
+
+        outcomes = []
+        for project in projects:
+            try:
+                outcomes.append(
+                    self.get_summary_data(project["project_id"], region_index, dates, project["project_info"]))
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+    def _plan_summary_batches(self, pending: List[tuple]) -> List[List[tuple]]:
+        """
+        Group projects sharing a region index and dates into batches of at most summary_batch_size.
+        :param pending: List of (index, project, dates) tuples.
+        :return: List of batches, each a list of (index, project, dates) tuples.
+        """
+        groups: Dict[tuple, List[tuple]] = {}
+        for item in pending:
+            index, project, dates = item
+            groups.setdefault((project["region_index"], tuple(dates)), []).append(item)
+
+        size = max(1, self.summary_batch_size)
+        return [group[i:i + size] for group in groups.values() for i in range(0, len(group), size)]
+
+    def _missing_dates(self, project: Dict, dates: List[str]) -> List[str]:
+        """
+        Drop dates already stored in SQLite for the project.
+        Today's date is always kept, since its checks may still be running.
+        :param project: Dictionary with project_id and region_index.
+        :param dates: Dates available in Topvisor.
+        :return: Dates that still need summary data.
+        """
+        if not dates:
+            return dates
+        today = datetime.now().strftime("%Y-%m-%d")
+        stored = self.index_db.get_stored_dates("project_data", project["project_id"], project["region_index"], min(dates))
+        missing = [date for date in dates if date not in stored or date == today]
+        logger.debug(
+            "project_id=%s, region_index=%s: %d of %d dates already stored",
+            project["project_id"], project["region_index"], len(dates) - len(missing), len(dates))
+        return missing
+
+    def _record_failure(self, project: Dict, error: Exception):
+        """
+        Log a failed project and remember it in self.failures.
+        """
+        project_id = project["project_id"]
+        region_index = project["region_index"]
+        logger.error("Project project_id=%s, region_index=%s failed: %s", project_id, region_index, error)
+        self.failures.append({"project_id": project_id, "region_index": region_index, "error": str(error)})
+
+    def fetch_project(self, project_id: int, region_index: int, project_info: Dict,
+                      days_back: int = 3) -> List[SummaryRow]:
+        """
+        Fetch summary data for a single project without touching the database.
+        Safe to call from worker threads.
         :param project_id: ID of the project.
         :param region_index: Index of the region.
         :param days_back: Number of days to look back.
-        :return: List of dictionaries containing processed data.
+        :return: List of rows containing processed data.
         """
-        logger.info(f"Processing project_id={project_id}, region_index={region_index}")
+        logger.info("Processing project_id=%s, region_index=%s", project_id, region_index)
 
         # Step 1: Get dates from history
         dates = self.get_dates_from_history(project_id, region_index, days_back)
         # Step 2: Get summary data for the dates
-        summary_data = self.get_summary_data(project_id, region_index, dates, project_info)
+        return self.get_summary_data(project_id, region_index, dates, project_info)
+
+    def process_project(self, project_id: int, region_index: int, project_info: Dict, days_back: int = 3) -> List[Dict]:
+        """
+        Process a single project and return the formatted data.
+        :param project_id: ID of the project.
+        :param region_index: Index of the region.
+        :param days_back: Number of days to look back.
+        :return: List of dictionaries containing processed data.
+        """
+        summary_data = self.fetch_project(project_id, region_index, project_info, days_back)
         # Step 3: Save data to the database
         self.save_to_db(summary_data)
 
-        return summary_data
+        return [row._asdict() for row in summary_data]
 
-    def run(self, days_back: int = 10) -> List[Dict]:
+    def _collect_projects(self) -> List[Dict]:
         """
-        Run the entire process for all projects and return the combined data.
-        :param days_back: Number of days to look back.
-        :return: List of dictionaries containing processed data for all projects.
+        Validate the configured projects and normalize them for processing.
+        :return: List of dictionaries with project_id, region_index and project_info.
         """
-        logger.info(f"Starting the process with days_back={days_back}...")
-
-        all_data = []
+        projects = []
         for project in self.config.get("projects", []):
             project_id = project.get("project_id")
             region_index = project.get("region_index")
@@ -173,88 +520,709 @@ class ProjectManager:
                     "Each project must have 'project_id', 'region_index', 'project_name', 'search_engine', and 'region'")
                 raise ValueError(
                     "Each project must have 'project_id', 'region_index', 'project_name', 'search_engine', and 'region'")
-            logger.info(f"Processing project_id={project_id}, region_index={region_index}")
-            project_info = {
-                "project_name": project_name,
-                "search_engine": search_engine,
-                "region": region
-            }
-            project_data = self.process_project(project_id, region_index, project_info, days_back)
-            all_data.extend(project_data)
-        logger.info(f"Process completed. Total records processed: {len(all_data)}")
-        self.copy_to_google_sheets()
-        logger.info(f"Google Sheets updated")
+            projects.append({
+                "project_id": project_id,
+                "region_index": region_index,
+                "project_info": {
+                    "project_name": project_name,
+                    "search_engine": search_engine,
+                    "region": region
+                }
+            })
+        return projects
+
+    def fetch_and_save(self, days_back: int = 10, workers: Optional[int] = None,
+                       refetch_stored: bool = False, projects: Optional[List[Dict]] = None) -> List[SummaryRow]:
+        """
+        Fetch the latest data of all configured projects and save it to SQLite, without syncing Google Sheets.
+        Projects are fetched concurrently, summary requests are batched for projects
+        sharing a region and dates, and results are saved to SQLite from the calling
+        thread in the order projects appear in the configuration.
+        A failing project is recorded in self.failures and does not stop the run.
+        :param days_back: Number of days to look back.
+        :param workers: Number of worker threads, defaults to concurrency.workers from settings.
+        :param refetch_stored: Request summary data for dates already stored in SQLite as well.
+        :param projects: Projects to fetch as returned by _collect_projects, all configured projects by default.
+        :return: List of rows saved, in configuration order.
+        """
+        workers = max(1, workers or self.workers)
+        logger.info("Starting the process with days_back=%s, workers=%s...", days_back, workers)
+        self.scheduler.start_run()
+
+        projects = self._collect_projects() if projects is None else projects
+        self.failures = []
+        results: Dict[int, List[SummaryRow]] = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="topvisor") as executor:
+            # Stage 1: get dates from history for every project
+            date_futures = [
+                executor.submit(self.get_dates_from_history, project["project_id"], project["region_index"], days_back)
+                for project in projects
+            ]
+            pending = []
+            for index, (project, future) in enumerate(zip(projects, date_futures)):
+                try:
+                    dates = future.result()
+                except Exception as e:
+                    self._record_failure(project, e)
+                    continue
+                if not refetch_stored:
+                    dates = self._missing_dates(project, dates)
+                if dates:
+                    pending.append((index, project, dates))
+                else:
+                    logger.info(
+                        "No new dates for project_id=%s, region_index=%s, skipping summary request.",
+                        project["project_id"], project["region_index"])
+
+            # Stage 2: get summary data, batching projects with the same region and dates
+            batch_futures = [
+                (batch, executor.submit(
+                    self.get_summary_batch,
+                    batch[0][1]["region_index"],
+                    batch[0][2],
+                    [project for index, project, dates in batch]
+                ))
+                for batch in self._plan_summary_batches(pending)
+            ]
+            for batch, future in batch_futures:
+                for (index, project, dates), outcome in zip(batch, future.result()):
+                    if isinstance(outcome, Exception):
+                        self._record_failure(project, outcome)
+                    else:
+                        results[index] = outcome
+
+        # Stage 3: save to SQLite from this thread, in configuration order
+        saved = []
+        for index in sorted(results):
+            self.save_to_db(results[index])
+            saved.extend(results[index])
+
+        if self.failures:
+            logger.error("%s of %s projects failed: %s", len(self.failures), len(projects), self.failures)
+        logger.info("Process completed. Total records processed: %s", len(saved))
+        if self.cache:
+            logger.info("Response cache stats: %s", self.cache.stats())
+        logger.info("Request scheduler stats: %s", self.scheduler.stats())
+        return saved
+
+    def sync_google_sheets(self, full_rebuild: bool = False):
+        """
+        Sync project data and, if enabled, the rollup tabs to Google Sheets.
+        :param full_rebuild: Rewrite the whole project data sheet instead of syncing only the changes.
+        """
+        self.copy_to_google_sheets(full_rebuild=full_rebuild)
+        if self.rollup_sheets:
+            self.export_rollups_to_google_sheets()
+        logger.info("Google Sheets updated")
+
+    def run_exporters(self, full_rebuild: bool = False) -> Dict[str, int]:
+        """
+        Run the local exporters; a failing exporter is logged and does not stop the others.
+        :param full_rebuild: Let every exporter rewrite its output from scratch.
+        :return: Dictionary of exporter name to rows written.
+        """
+        written = {}
+        for exporter in self.exporters:
+            try:
+                with self.metrics.stage(f"export_{exporter.name}"):
+                    written[exporter.name] = exporter.export(self.db, full_rebuild=full_rebuild)
+                    self.metrics.add(rows=written[exporter.name])
+            except Exception as e:
+                logger.error("Exporter %s failed: %s", exporter.name, e)
+        return written
+
+    def export(self, full_rebuild: bool = False):
+        """
+        Sync Google Sheets and run the local exporters.
+        :param full_rebuild: Rewrite all exported data instead of only adding the changes.
+        """
+        self.sync_google_sheets(full_rebuild=full_rebuild)
+        self.run_exporters(full_rebuild=full_rebuild)
+
+    def run(self, days_back: int = 10, workers: Optional[int] = None, full_rebuild: bool = False,
+            refetch_stored: bool = False) -> List[Dict]:
+        """
+        Run the entire process for all projects and return the combined data.
+        :param days_back: Number of days to look back.
+        :param workers: Number of worker threads, defaults to concurrency.workers from settings.
+        :param full_rebuild: Rewrite the whole Google Sheet instead of syncing only the changes.
+        :param refetch_stored: Request summary data for dates already stored in SQLite as well.
+        :return: List of dictionaries containing processed data for all projects.
+        """
+        self.metrics.reset()
+        all_data = [row._asdict() for row in self.fetch_and_save(days_back, workers, refetch_stored)]
+        self.export(full_rebuild=full_rebuild)
+        self._write_run_metrics(
+            mode="run", records=len(all_data), failures=self.failures,
+            cache=self.cache.stats() if self.cache else None)
         return all_data
 
-    def save_to_db(self, data: List[Dict]):
+    def _plan_shards(self, shards: int) -> List[List[Dict]]:
         """
-        Save data to the SQLite database and then copy it to Google Sheets.
-        :param data: List of dictionaries containing data to save.
+        Split the configured projects into shards.
+        Projects with a shard_group share a shard (an integer group is used as the shard number),
+        the others are spread by a stable hash of project_id and region_index.
+        :param shards: Number of shards.
+        :return: List of project configuration lists, one per shard.
         """
-        for record in data:
-            if not self.db.record_exists("project_data", record["date"], record["project_id"], record["region_index"]):
-                self.db.create("project_data", record)
+        planned = [[] for _ in range(shards)]
+        for project in self.config.get("projects", []):
+            group = project.get("shard_group")
+            if isinstance(group, int):
+                index = group % shards
             else:
-                logger.debug(
-                    f"Record for date={record['date']}, project_id={record['project_id']}, region_index={record['region_index']} already exists. Skipping.")
-        logger.info("Data saved to SQLite successfully.")
+                key = group if group is not None else f"{project.get('project_id')}:{project.get('region_index')}"
+                index = zlib.crc32(str(key).encode("utf-8")) % shards
+            planned[index].append(project)
+        return planned
 
+    def run_sharded(self, shards: int, days_back: int = 10, workers: Optional[int] = None,
+                    full_rebuild: bool = False, refetch_stored: bool = False) -> int:
+        """
+        Run the projects split into shards, each in its own process with its own Topvisor client
+        and SQLite file. Shard files are merged into the main database in a single step,
+        followed by one Google Sheets sync. A database with concurrent writers (PostgreSQL)
+        is written by the shards directly, without shard files.
+        :param shards: Number of worker processes.
+        :param days_back: Number of days to look back.
+        :param workers: Number of worker threads per process.
+        :param full_rebuild: Rewrite the whole Google Sheet instead of syncing only the changes.
+        :param refetch_stored: Request summary data for dates already stored in SQLite as well.
+        :return: Number of records saved by all shards.
+        """
+        self._collect_projects()
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.metrics.reset()
+        plan = [projects for projects in self._plan_shards(max(1, shards)) if projects]
+        config_data = self._shard_config(len(plan))
+        logger.info("Starting sharded run: %s shards, sizes %s", len(plan), [len(projects) for projects in plan])
+
+        self.failures = []
+        records = 0
+        with tempfile.TemporaryDirectory(prefix="topvisor-shards-") as shard_dir:
+            if self.db.concurrent_writers:
+                shard_paths, main_db_path = [None] * len(plan), None
+            else:
+                shard_paths = [str(Path(shard_dir) / f"shard_{index}.db") for index in range(len(plan))]
+                main_db_path = self.db.db_path
+            with ProcessPoolExecutor(max_workers=len(plan)) as executor:
+                futures = [
+                    executor.submit(
+                        _run_shard, config_data, projects, shard_path, main_db_path,
+                        days_back, workers, refetch_stored)
+                    for projects, shard_path in zip(plan, shard_paths)
+                ]
+                for index, future in enumerate(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error("Shard %s failed: %s", index, e)
+                        self.failures.extend(
+                            {"project_id": project.get("project_id"), "region_index": project.get("region_index"),
+                             "error": f"shard {index}: {e}"}
+                            for project in plan[index])
+                        continue
+                    self.failures.extend(result["failures"])
+                    records += result["records"]
+                    self.metrics.merge(result["metrics"])
+                    logger.info("Shard %s finished: %s records, %s failures, %ss",
+                                index, result["records"], len(result["failures"]), result["seconds"])
 
+            # Merge step: shard files are imported one by one into the main database
+            if not self.db.concurrent_writers:
+                with self.metrics.stage("merge_shards"):
+                    for shard_path in shard_paths:
+                        if Path(shard_path).exists():
+                            counts = self.db.merge_from(shard_path)
+                            self.metrics.add(rows=counts["inserted"] + counts["updated"])
+                            logger.info("Merged %s: %s", shard_path, counts)
 
-    def copy_to_google_sheets(self):
+        if self.failures:
+            logger.error("%s projects failed: %s", len(self.failures), self.failures)
+        self.export(full_rebuild=full_rebuild)
+        self._write_run_metrics(mode="sharded", shards=len(plan), records=records, failures=self.failures)
+        return records
+
+    def _shard_config(self, shards: int) -> Dict:
+        """
+        Build the configuration of a shard process. Every shard has its own request scheduler and
+        per-host semaphore, so the rate limit, burst and max_per_host are divided between the shards
+        to keep the whole run within the configured limits.
+        :param shards: Number of shards.
+        :return: Configuration dictionary.
+        """
+        config_data = self.config.to_dict() if isinstance(self.config, Config) else dict(self.config)
+        rate_limit = dict(config_data.get("rate_limit") or {})
+        rate_limit["requests_per_second"] = float(rate_limit.get("requests_per_second", 5)) / shards
+        rate_limit["burst"] = max(1, int(rate_limit.get("burst", 10)) // shards)
+        concurrency = dict(config_data.get("concurrency") or {})
+        concurrency["max_per_host"] = max(1, self.max_per_host // shards)
+        return dict(config_data, rate_limit=rate_limit, concurrency=concurrency)
+
+    @staticmethod
+    def _split_date_range(start_date: str, end_date: str, chunk_days: int) -> List[tuple]:
+        """
+        Split a date range into consecutive chunks of at most chunk_days days.
+        :param start_date: First date of the range (YYYY-MM-DD).
+        :param end_date: Last date of the range (YYYY-MM-DD).
+        :param chunk_days: Maximum number of days per chunk.
+        :return: List of (chunk_start, chunk_end) date strings.
+        """
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        if start > end:
+            raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+
+        chunks = []
+        while start <= end:
+            chunk_end = min(start + timedelta(days=chunk_days - 1), end)
+            chunks.append((start.strftime("%Y-%m-%d"), chunk_end.strftime("%Y-%m-%d")))
+            start = chunk_end + timedelta(days=1)
+        return chunks
+
+    @instrumented("backfill_chunk")
+    def fetch_chunk(self, project: Dict, chunk_start: str, chunk_end: str) -> List[SummaryRow]:
+        """
+        Fetch summary data for every checked date of a project within a date range.
+        :param project: Dictionary with project_id, region_index and project_info.
+        :param chunk_start: First date of the chunk (YYYY-MM-DD).
+        :param chunk_end: Last date of the chunk (YYYY-MM-DD).
+        :return: List of rows containing processed data.
+        """
+        project_id = project["project_id"]
+        region_index = project["region_index"]
+        logger.info("Backfilling project_id=%s, region_index=%s, %s..%s", project_id, region_index, chunk_start, chunk_end)
+
+        dates = self.get_exists_dates(project_id, region_index, chunk_start, chunk_end)
+        if not dates:
+            return []
+        return self.get_summary_data(project_id, region_index, dates, project["project_info"])
+
+    def backfill(self, start_date: str, end_date: str, chunk_days: Optional[int] = None,
+                 workers: Optional[int] = None) -> int:
+        """
+        Load the history of all projects for a date range.
+        The range is split into chunks that are fetched concurrently; every completed chunk
+        is checkpointed in SQLite, so an interrupted backfill resumes where it stopped.
+        :param start_date: First date of the range (YYYY-MM-DD).
+        :param end_date: Last date of the range (YYYY-MM-DD).
+        :param chunk_days: Days per chunk, defaults to backfill.chunk_days from settings.
+        :param workers: Number of worker threads, defaults to backfill.workers from settings.
+        :return: Number of records saved.
         """
-        Copy all data from SQLite to Google Sheets.
+        self.metrics.reset()
+        self.scheduler.start_run()
+        backfill_settings = self.config.get("backfill") or {}
+        chunk_days = max(1, chunk_days or int(backfill_settings.get("chunk_days", 30)))
+        workers = max(1, workers or int(backfill_settings.get("workers", self.workers)))
+        logger.info("Starting backfill %s..%s with chunk_days=%s, workers=%s...",
+                    start_date, end_date, chunk_days, workers)
+
+        chunks = self._split_date_range(start_date, end_date, chunk_days)
+        tasks = []
+        for project in self._collect_projects():
+            completed = self.db.get_completed_chunks(project["project_id"], project["region_index"])
+            tasks.extend((project, chunk) for chunk in chunks if chunk not in completed)
+        logger.info("%s chunks to backfill.", len(tasks))
+
+        self.failures = []
+        saved = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as executor:
+            futures = {
+                executor.submit(self.fetch_chunk, project, chunk_start, chunk_end): (project, chunk_start, chunk_end)
+                for project, (chunk_start, chunk_end) in tasks
+            }
+            for future in as_completed(futures):
+                project, chunk_start, chunk_end = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    self._record_failure(project, e)
+                    continue
+                self.save_to_db(data)
+                self.db.mark_chunk_completed(project["project_id"], project["region_index"], chunk_start, chunk_end)
+                saved += len(data)
+
+        if self.failures:
+            logger.error("%s of %s chunks failed, re-run backfill to retry them.", len(self.failures), len(tasks))
+        logger.info("Backfill completed. Total records saved: %s", saved)
+        self.export()
+        self._write_run_metrics(
+            mode="backfill", records=saved, failures=self.failures,
+            cache=self.cache.stats() if self.cache else None)
+        return saved
+
+    def _send_request(self, endpoint: str, payload: Dict) -> Dict:
+        """
+        Send a raw Topvisor API request through the request scheduler, holding a connection slot.
+        Used for requests pytopvisor's tasks can't express; responses are not cached.
+        :param endpoint: API endpoint, e.g. KEYWORD_HISTORY_ENDPOINT.
+        :param payload: Request body.
+        :return: Raw API response.
+        """
+        def attempt():
+            with self._topvisor_slots:
+                return self.topvisor.api_client.send_request(endpoint, payload)
+
+        response = self.scheduler.execute(endpoint, attempt)
+        self.metrics.add(bytes_in=len(json.dumps(response, default=str)))
+        return response
+
+    def iter_keyword_positions(self, project_id: int, region_index: int, start_date: str, end_date: str,
+                               page_size: int = 1000) -> Iterator[List[tuple]]:
+        """
+        Stream the keyword positions of a project page by page.
+        :param project_id: ID of the project.
+        :param region_index: Index of the region.
+        :param start_date: First date (YYYY-MM-DD).
+        :param end_date: Last date (YYYY-MM-DD).
+        :param page_size: Keywords per request.
+        :return: Generator of pages, each a list of (keyword_id, keyword name, date, position) tuples;
+                 position is None for keywords not found in the top.
+        """
+        offset = 0
+        while offset is not None:
+            response = self._send_request(KEYWORD_HISTORY_ENDPOINT, {
+                "project_id": project_id,
+                "regions_indexes": [region_index],
+                "date1": start_date,
+                "date2": end_date,
+                "positions_fields": ["position"],
+                "limit": page_size,
+                "offset": offset,
+            })
+            keywords = response["result"]["keywords"]
+            page = []
+            for keyword in keywords:
+                for key, data in (keyword.get("positionsData") or {}).items():
+                    # Keys look like "2024-01-31:<project_id>:<region_index>"
+                    position = str((data or {}).get("position", ""))
+                    page.append((int(keyword["id"]), keyword["name"], key.split(":")[0],
+                                 int(position) if position.isdigit() else None))
+            if page:
+                yield page
+            offset = response.get("nextOffset") if len(keywords) >= page_size else None
+
+    def ingest_keyword_positions(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                 workers: Optional[int] = None, page_size: Optional[int] = None) -> int:
+        """
+        Load keyword-level positions of all projects into the keyword tables.
+        Projects are streamed concurrently; pages go through a bounded queue and are bulk-inserted
+        from the calling thread as they arrive, so memory use stays within a few pages.
+        :param start_date: First date (YYYY-MM-DD), defaults to keywords.days_back days ago.
+        :param end_date: Last date (YYYY-MM-DD), defaults to today.
+        :param workers: Number of worker threads, defaults to keywords.workers from settings.
+        :param page_size: Keywords per request, defaults to keywords.page_size from settings.
+        :return: Number of positions inserted or updated.
+        """
+        self.metrics.reset()
+        self.scheduler.start_run()
+        keyword_settings = self.config.get("keywords") or {}
+        workers = max(1, workers or int(keyword_settings.get("workers", self.workers)))
+        page_size = max(1, page_size or int(keyword_settings.get("page_size", 1000)))
+        end_date = end_date or datetime.now().strftime("%Y-%m-%d")
+        start_date = start_date or (
+            datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=int(keyword_settings.get("days_back", 1)))
+        ).strftime("%Y-%m-%d")
+        logger.info("Starting keyword positions ingestion %s..%s, workers=%s...", start_date, end_date, workers)
+
+        projects = self._collect_projects()
+        pages: queue.Queue = queue.Queue(maxsize=2 * workers)
+        cancelled = threading.Event()
+
+        def produce(project: Dict):
+            try:
+                with self.metrics.stage("fetch_keyword_positions", project["project_id"]):
+                    for page in self.iter_keyword_positions(
+                            project["project_id"], project["region_index"], start_date, end_date, page_size):
+                        if cancelled.is_set():
+                            return
+                        pages.put((project, page))
+            except Exception as e:
+                pages.put((project, e))
+            finally:
+                pages.put((project, None))
+
+        self.failures = []
+        saved = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="keywords") as executor:
+            for project in projects:
+                executor.submit(produce, project)
+            remaining = len(projects)
+            try:
+                while remaining:
+                    project, page = pages.get()
+                    if page is None:
+                        remaining -= 1
+                    elif isinstance(page, Exception):
+                        self._record_failure(project, page)
+                    else:
+                        with self.metrics.stage("save_keyword_positions", project["project_id"]):
+                            saved += self.db.save_keyword_positions(
+                                project["project_id"], project["region_index"], page)
+                            self.metrics.add(rows=len(page))
+            except BaseException:
+                # Unblock the producers before the executor waits for them
+                cancelled.set()
+                while remaining:
+                    remaining -= pages.get()[1] is None
+                raise
+
+        if self.failures:
+            logger.error("%s of %s projects failed: %s", len(self.failures), len(projects), self.failures)
+        logger.info("Keyword positions ingestion completed. Positions inserted or updated: %s", saved)
+        self._write_run_metrics(mode="keywords", records=saved, failures=self.failures)
+        return saved
+
+    @instrumented("save_to_db")
+    def save_to_db(self, data: List[SummaryRow]):
+        """
+        Save data to the SQLite database in a single transaction.
+        Rows already stored are overwritten when Topvisor returns corrected values.
+        :param data: List of rows containing data to save.
+        """
+        counts = self.db.bulk_upsert_rows("project_data", SHEET_COLUMNS, data)
+        if counts["inserted"] or counts["updated"]:
+            self.db.update_rollups((row.project_id, row.region_index, row.date) for row in data)
+        self.metrics.add(rows=len(data))
+        logger.info(
+            "Data saved to SQLite successfully: %d inserted, %d updated, %d unchanged.",
+            counts["inserted"], counts["updated"], counts["unchanged"])
+
+    @instrumented("copy_to_google_sheets")
+    def copy_to_google_sheets(self, full_rebuild: bool = False):
+        """
+        Sync data from SQLite to Google Sheets.
+        By default only rows that are new or changed since the last sync are sent:
+        new rows are appended and changed rows are rewritten in place.
+        Only rows recorded in the change log after the sheet's cursor are read, so the work
+        depends on the number of changes, not on the table size. Without a cursor (first sync
+        after the change log was added) the whole table is compared with the sync state once.
+        :param full_rebuild: Rewrite the whole sheet from SQLite instead.
+        """
+        # Changes logged while syncing are left for the next sync
+        until = self.db.get_change_seq()
+        last_row = 0 if full_rebuild else self.db.get_max_sheet_row(SHEET_NAME)
+        if not last_row:
+            self._rebuild_google_sheet()
+            self._save_sheet_cursor(until)
+            return
+
+        plan = self._plan_sheet_sync(last_row, until)
+        self._upload_sheet_sync(plan)
+        self._commit_sheet_sync(plan)
+
+    def _plan_sheet_sync(self, last_row: int, until: int) -> SheetSyncPlan:
+        """
+        Read the rows changed since the sheet's cursor and work out what to write; SQLite reads only.
+        :param last_row: Last sheet row synced so far.
+        :param until: Last change log sequence number to include.
+        :return: SheetSyncPlan for _upload_sheet_sync and _commit_sheet_sync.
+        """
+        since = self.db.get_cursor(SHEET_CURSOR)
+        logger.info("Syncing new and changed data from SQLite to Google Sheets (changes %s..%s)...",
+                    since + 1 if since is not None else "all", until)
+        new_rows = []
+        changed_rows = []
+        for chunk in self.db.iter_sync_rows(SHEET_NAME, "project_data", SHEET_COLUMNS, self.export_chunk_size,
+                                            since=since, until=until):
+            for record in chunk:
+                row = list(record[:-2])
+                sheet_row, synced_hash = record[-2:]
+                row_hash = self._row_hash(row)
+                if sheet_row is None:
+                    new_rows.append((tuple(row[:3]), row, row_hash))
+                elif synced_hash != row_hash:
+                    changed_rows.append((sheet_row, tuple(row[:3]), row, row_hash))
+
+        # Rewrite changed rows, grouping consecutive sheet rows into one range
+        changed_rows.sort(key=lambda item: item[0])
+        blocks = []
+        for sheet_row, key, row, row_hash in changed_rows:
+            if blocks and sheet_row == blocks[-1][0] + len(blocks[-1][1]):
+                blocks[-1][1].append(row)
+            else:
+                blocks.append((sheet_row, [row]))
+        synced = [(*key, sheet_row, row_hash) for sheet_row, key, row, row_hash in changed_rows]
+
+        new_rows.sort(key=lambda item: item[0])
+        synced.extend((*key, last_row + 1 + i, row_hash) for i, (key, row, row_hash) in enumerate(new_rows))
+        return SheetSyncPlan(until, blocks, [row for key, row, row_hash in new_rows], last_row + 1, synced)
+
+    def _upload_sheet_sync(self, plan: SheetSyncPlan):
+        """
+        Write a planned sync to Google Sheets; no SQLite access.
+        :param plan: Result of _plan_sheet_sync.
+        """
+        # New rows are written below the last synced row in the same bounded, retried chunks as updates
+        ranges = list(plan.blocks)
+        if plan.appended:
+            ranges.append((plan.append_row, plan.appended))
+        if ranges:
+            self._batch_write_sheet(ranges)
+
+    def _commit_sheet_sync(self, plan: SheetSyncPlan):
+        """
+        Store the sync state and cursor of an uploaded sync.
+        :param plan: Result of _plan_sheet_sync.
+        """
+        self.db.save_sync_state(SHEET_NAME, plan.synced)
+        self._save_sheet_cursor(plan.until)
+        logger.info(
+            "Google Sheets synced: %s rows appended, %s rows updated.",
+            len(plan.appended), len(plan.synced) - len(plan.appended))
+
+    def _save_sheet_cursor(self, seq: int):
+        """
+        Advance the sheet export's change log cursor and drop the entries no consumer needs anymore.
+        Only the cursors of the sheet and the configured exporters count, so the cursor left by
+        a removed exporter does not stop the pruning.
+        :param seq: Last change log sequence number reflected in the sheet.
+        """
+        self.db.save_cursor(SHEET_CURSOR, seq)
+        consumers = [SHEET_CURSOR] + [exporter.consumer for exporter in self.exporters if exporter.consumer]
+        pruned = self.db.prune_change_log(consumers)
+        if pruned:
+            logger.debug("Pruned %d processed change log entries.", pruned)
+
+    def _rebuild_google_sheet(self):
+        """
+        Copy all data from SQLite to Google Sheets chunk by chunk and reset the sync state.
         """
         logger.info("Copying data from SQLite to Google Sheets...")
+        self.db.reset_sync_state(SHEET_NAME)
 
-        # Read all data from SQLite
-        sqlite_data = self.db.read("project_data")
+        # Data rows start right below the header
+        next_row = 2
+        self._batch_write_sheet([(1, [SHEET_HEADER])])
+        for chunk in self.db.iter_rows("project_data", columns=SHEET_COLUMNS, chunk_size=self.export_chunk_size):
+            rows = [list(record) for record in chunk]
+            self._batch_write_sheet([(next_row, rows)])
+            self.db.save_sync_state(SHEET_NAME, [
+                (*row[:3], next_row + i, self._row_hash(row)) for i, row in enumerate(rows)
+            ])
+            next_row += len(rows)
+        logger.info("Data copied to Google Sheets successfully: %s rows.", next_row - 2)
 
-        # Transform data into a list of rows for Google Sheets
-        rows = [
-            [
-                record["date"],
-                record["project_id"],
-                record["region_index"],
-                record["all_positions"],
-                record["top_1_3"],
-                record["top_1_10"],
-                record["top_11_30"],
-                record["top_31_50"],
-                record["top_51_100"],
-                record["avg_position"],
-                record["visibility"],
-                record["project_name"],  # New column
-                record["search_engine"],  # New column
-                record["region"]  # New column
-            ]
-            for record in sqlite_data
-        ]
-        header = [
-            "Date",
-            "Project ID",
-            "Region Index",
-            "All Keywords",
-            "Top 1-3",
-            "Top 1-10",
-            "Top 11-30",
-            "Top 31-50",
-            "Top 51-100",
-            "Avg Position",
-            "Visibility",
-            "Project Name",  # New header
-            "Search Engine",  # New header
-            "Region"  # New header
-        ]
-        rows.insert(0, header)
-        self.google_sheets.write("TopvisorDB", "A1", rows)
-        logger.info("Data copied to Google Sheets successfully.")
+    @instrumented("export_rollups")
+    def export_rollups_to_google_sheets(self):
+        """
+        Write the weekly and monthly rollup tables to their own sheet tabs.
+        Rollups are small, so every tab is rewritten in full. A failing tab (e.g. one missing
+        from the spreadsheet) is logged and does not stop the others or the rest of the run.
+        """
+        for table_name, sheet_name in self.rollup_sheets.items():
+            next_row = 2
+            try:
+                self._batch_write_sheet([(1, [ROLLUP_COLUMNS])], sheet_name)
+                for chunk in self.db.iter_rows(table_name, columns=ROLLUP_COLUMNS,
+                                               order_by="period_start, project_id, region_index",
+                                               chunk_size=self.export_chunk_size):
+                    self._batch_write_sheet([(next_row, [list(record) for record in chunk])], sheet_name)
+                    next_row += len(chunk)
+            except Exception as e:
+                logger.error("Rollup %s export to sheet %s failed: %s", table_name, sheet_name, e)
+                continue
+            logger.info("Rollup %s exported to sheet %s: %s rows.", table_name, sheet_name, next_row - 2)
+
+    def _batch_write_sheet(self, ranges: List[tuple], sheet_name: str = SHEET_NAME):
+        """
+        Write row ranges to the sheet and record the rows and bytes sent.
+        :param ranges: List of (start_row, rows) tuples.
+        :param sheet_name: Name of the sheet.
+        """
+        for report in self.google_sheets.batch_write(sheet_name, ranges):
+            self.metrics.add(rows=report["rows"], bytes_out=report["bytes"])
+
+    def _write_run_metrics(self, **extra):
+        """
+        Append the metrics of the finished run to the metrics file and log a short summary.
+        :param extra: Additional fields for the summary.
+        """
+        metrics_settings = self.config.get("metrics") or {}
+        path = metrics_settings.get("path") or str(Path(self.config.get("base_dir") or ".") / "logs" / "run_metrics.jsonl")
+        summary = self.metrics.write(path, **extra)
+        for stage, values in summary["stages"].items():
+            logger.info("Stage %s: %s", stage, values)
+
+    @staticmethod
+    def _row_hash(row: List) -> str:
+        """
+        Hash a sheet row to detect changes since the last sync.
+        """
+        return hashlib.md5(json.dumps(row, default=str).encode("utf-8")).hexdigest()
+
+
+def _run_shard(config_data: Dict, projects: List[Dict], db_path: Optional[str], main_db_path: Optional[str],
+               days_back: int, workers: Optional[int], refetch_stored: bool) -> Dict:
+    """
+    Worker process of ProjectManager.run_sharded: fetch one shard of projects into its own SQLite file.
+    Already stored dates are looked up in the main database, which is only read here.
+    Without db_path the shard writes to the configured database directly.
+    :return: Dictionary with the number of records, failures, elapsed seconds and the run metrics.
+    """
+    started = time.perf_counter()
+    if db_path is None:
+        manager = ProjectManager(dict(config_data, projects=projects))
+        db, index_db = manager.db, None
+    else:
+        sqlite_settings = dict(config_data.get("sqlite") or {})
+        sqlite_settings.pop("path", None)
+        # Shard files are temporary, durability is provided by the merge into the main database
+        db = SQLiteDB(db_path, profile={**sqlite_settings, "synchronous": "OFF"})
+        index_db = SQLiteDB(main_db_path, profile=sqlite_settings) if main_db_path != ":memory:" else None
+        manager = ProjectManager(dict(config_data, projects=projects), db=db, index_db=index_db)
+    try:
+        rows = manager.fetch_and_save(days_back, workers, refetch_stored)
+    finally:
+        db.close()
+        if index_db:
+            index_db.close()
+    return {"records": len(rows), "failures": manager.failures, "seconds": round(time.perf_counter() - started, 3),
+            "metrics": manager.metrics.summary()}
 
 
 if __name__ == "__main__":
+    import argparse
     from config.settings import Config
 
+    parser = argparse.ArgumentParser(description="Load Topvisor data into SQLite and Google Sheets.")
+    parser.add_argument("--backfill", nargs=2, metavar=("START_DATE", "END_DATE"),
+                        help="Load history for a date range (YYYY-MM-DD) instead of the latest dates.")
+    parser.add_argument("--chunk-days", type=int, help="Days per backfill chunk.")
+    parser.add_argument("--shards", type=int, help="Split projects across this many worker processes.")
+    parser.add_argument("--keywords", action="store_true",
+                        help="Load keyword-level positions instead of project summaries.")
+    parser.add_argument("--async", dest="async_pipeline", action="store_true",
+                        help="Run fetching, SQLite writes and Sheets uploads as overlapping async stages.")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep running and poll every project at its refresh interval.")
+    args = parser.parse_args()
+
     config = Config()
 
-    pm = ProjectManager(config)
-    pm.run()
\ No newline at end of file
+    # Only the manager of the selected mode is built: each one opens its own clients, database and cache
+    if args.backfill:
+        ProjectManager(config).backfill(*args.backfill, chunk_days=args.chunk_days)
+    elif args.keywords:
+        ProjectManager(config).ingest_keyword_positions()
+    elif args.shards:
+        ProjectManager(config).run_sharded(args.shards)
+    elif args.async_pipeline:
+        import asyncio
+        from async_manager import AsyncProjectManager
+
+        asyncio.run(AsyncProjectManager(config).arun())
+    elif args.daemon:
+        import signal
+        from daemon import DaemonProjectManager
+
+        daemon = DaemonProjectManager(config)
+        signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+        try:
+            daemon.run_forever()
+        except KeyboardInterrupt:
+            daemon.stop()
+    else:
+        ProjectManager(config).run()
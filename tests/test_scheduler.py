@@ -0,0 +1,43 @@
+"""
+Retry behaviour of the RequestScheduler against errors raised the way the Topvisor client raises them.
+"""
+import pytest
+
+from api.scheduler import RequestScheduler, error_status, is_retryable
+from fakes.sheets_service import FakeHttpError
+from fakes.topvisor import FakeTopvisor
+
+pytopvisor_exceptions = pytest.importorskip("pytopvisor.utils.exceptions")
+
+
+def history(client: FakeTopvisor) -> dict:
+    return client.run_task("get_history", project_id=1, regions_indexes=[1], date1="2024-01-01", date2="2024-01-02")
+
+
+def test_error_status():
+    assert error_status(FakeHttpError(502)) == 502
+    assert error_status(pytopvisor_exceptions.RateLimitError("[429] Too many requests. ")) == 429
+    assert error_status(pytopvisor_exceptions.ServerError("[503] Service unavailable. ")) == 503
+    assert error_status(pytopvisor_exceptions.TopvisorAPIError("[500] Internal error. ")) == 500
+    assert error_status(RuntimeError("[500] not a Topvisor error")) is None
+    assert not is_retryable(pytopvisor_exceptions.AuthenticationError("[53] Invalid token. "))
+
+
+def test_retries_topvisor_errors():
+    client = FakeTopvisor(api_errors=[429, 503, 0])
+    scheduler = RequestScheduler(requests_per_second=100, burst=10, backoff_base=0)
+    response = scheduler.execute("get_history", lambda: history(client))
+    assert response["result"]["existsDates"] == ["2024-01-01", "2024-01-02"]
+    assert client.calls["get_history"] == 3
+    assert scheduler.retries == 2
+    # Rate limiting slowed the bucket down
+    assert scheduler.bucket.rate < 100
+
+
+def test_does_not_retry_invalid_requests():
+    client = FakeTopvisor(api_errors=[1000])
+    scheduler = RequestScheduler(backoff_base=0)
+    with pytest.raises(pytopvisor_exceptions.InvalidRequestError):
+        scheduler.execute("get_history", lambda: history(client))
+    assert client.calls["get_history"] == 1
+    assert scheduler.retries == 0